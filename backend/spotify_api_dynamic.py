@@ -3,18 +3,44 @@ Spotify Wrapped Analysis API — Complete Working Backend
 """
 
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
+import orjson
 import pandas as pd
 import numpy as np
 import os
 import pickle
+import shutil
+import tempfile
 from datetime import datetime
-from collections import Counter
+from functools import wraps
+from sklearn.neighbors import NearestNeighbors
 
 import matplotlib
 matplotlib.use('Agg')
 
+# Copy-on-Write is always on from pandas 3.0; opt in on older releases
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson, which serializes NumPy scalars natively"""
+    
+    sort_keys = True
+    
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)
 
 UPLOAD_FOLDER = 'uploads'
@@ -24,36 +50,192 @@ app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024
 
 df = None
 
+# Endpoint results are cached until the next /upload replaces df
+_CACHE = {}
+_DATA_VERSION = 0
+
+# Whole-frame aggregates computed once per upload
+SUMMARIES = {}
+
+# Repeated string columns stored as category so value_counts works on codes
+CATEGORY_COLUMNS = ['Artist Name(s)', 'Track Name', 'Genres']
+
 # ============================================================================
 # MOOD PREDICTION
 # ============================================================================
 
-def predict_mood(row):
-    """Predict mood from audio features"""
-    try:
-        danceability = float(row.get('Danceability', 0.5))
-        energy = float(row.get('Energy', 0.5))
-        valence = float(row.get('Valence', 0.5))
-        acousticness = float(row.get('Acousticness', 0.5))
-        tempo = float(row.get('Tempo', 120))
-        
-        tempo_norm = min(tempo / 200, 1.0)
-        
-        happy_score = (valence * 0.4) + (energy * 0.3) + (danceability * 0.3)
-        sad_score = ((1 - valence) * 0.5) + ((1 - energy) * 0.3) + (acousticness * 0.2)
-        energetic_score = (energy * 0.5) + (danceability * 0.3) + (tempo_norm * 0.2)
-        chill_score = (acousticness * 0.4) + ((1 - energy) * 0.4) + ((1 - danceability) * 0.2)
-        
-        scores = {
-            'Happy': happy_score,
-            'Sad': sad_score,
-            'Energetic': energetic_score,
-            'Chill': chill_score
+MOOD_LABELS = ['Happy', 'Sad', 'Energetic', 'Chill']
+MOOD_DEFAULTS = {
+    'Danceability': 0.5,
+    'Energy': 0.5,
+    'Valence': 0.5,
+    'Acousticness': 0.5,
+    'Tempo': 120
+}
+
+def predict_mood(df):
+    """Predict mood for every row from audio features"""
+    features = {}
+    for col, default in MOOD_DEFAULTS.items():
+        if col in df.columns:
+            features[col] = pd.to_numeric(df[col], errors='coerce').fillna(default).to_numpy(dtype=np.float64)
+        else:
+            features[col] = np.full(len(df), default, dtype=np.float64)
+    
+    danceability = features['Danceability']
+    energy = features['Energy']
+    valence = features['Valence']
+    acousticness = features['Acousticness']
+    tempo_norm = np.minimum(features['Tempo'] / 200, 1.0)
+    
+    # One row per mood, in MOOD_LABELS order, filled in place
+    scores = np.empty((len(MOOD_LABELS), len(df)), dtype=np.float64)
+    scores[0] = (valence * 0.4) + (energy * 0.3) + (danceability * 0.3)
+    scores[1] = ((1 - valence) * 0.5) + ((1 - energy) * 0.3) + (acousticness * 0.2)
+    scores[2] = (energy * 0.5) + (danceability * 0.3) + (tempo_norm * 0.2)
+    scores[3] = (acousticness * 0.4) + ((1 - energy) * 0.4) + ((1 - danceability) * 0.2)
+    
+    return pd.Categorical.from_codes(scores.argmax(axis=0), categories=MOOD_LABELS)
+
+# ============================================================================
+# CACHING
+# ============================================================================
+
+# Only ?n= values in 0..MAX_TOP_N are memoized, which bounds the cache per endpoint;
+# larger or negative values are still served, just computed on every request
+MAX_TOP_N = 50
+
+def memoize_on_df(view):
+    """Cache a successful endpoint's serialized response until the uploaded data changes"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # The views only read n; a missing or non-integer n means the view's default
+        n = request.args.get('n', type=int)
+        cacheable = n is None or 0 <= n <= MAX_TOP_N
+        key = (view.__name__, _DATA_VERSION, n)
+        if cacheable and key in _CACHE:
+            return app.response_class(_CACHE[key], mimetype='application/json'), 200
+        
+        response, status = view(*args, **kwargs)
+        if cacheable and status == 200:
+            _CACHE[key] = response.get_data()
+        return response, status
+    return wrapper
+
+# ============================================================================
+# ERROR HANDLING
+# ============================================================================
+
+@app.errorhandler(Exception)
+def on_error(e):
+    """Report unhandled endpoint errors as JSON"""
+    if isinstance(e, HTTPException):
+        return e
+    return jsonify({'error': str(e)}), 500
+
+
+def requires_df(view):
+    """Reject analytics requests until a playlist has been uploaded"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if df is None:
+            return jsonify({'error': 'No data'}), 400
+        return view(*args, **kwargs)
+    return wrapper
+
+# ============================================================================
+# SUMMARIES
+# ============================================================================
+
+AUDIO_FEATURE_COLUMNS = ['Danceability', 'Energy', 'Valence', 'Acousticness', 'Speechiness', 'Instrumentalness', 'Liveness']
+
+def _build_summaries(df):
+    """Compute every whole-frame aggregate in one pass over the uploaded data"""
+    total = len(df)
+    
+    total_ms = df['Duration (ms)'].sum()
+    hours = total_ms / 3600000
+    days = hours / 24
+    
+    popularity = df['Popularity'].agg(['mean', 'median', 'min', 'max'])
+    
+    artists = df['Artist Name(s)']
+    if isinstance(artists.dtype, pd.CategoricalDtype):
+        unique_artists = len(artists.cat.categories)
+    else:
+        unique_artists = artists.nunique()
+    
+    has_explicit = 'Explicit' in df.columns
+    explicit_count = int(df['Explicit'].sum()) if has_explicit else 0
+    explicit_pct = round((explicit_count / total * 100), 2) if has_explicit else 0
+    
+    mood_counts = df['Mood'].value_counts()
+    mood_counts = mood_counts[mood_counts > 0]
+    
+    popularity_class = pd.cut(
+        df['Popularity'],
+        bins=[-np.inf, 40, 70, np.inf],
+        labels=['Low', 'Medium', 'High'],
+        right=False
+    )
+    popularity_counts = popularity_class.value_counts()
+    popularity_counts = popularity_counts[popularity_counts > 0]
+    
+    yearly, monthly = {}, {}
+    if 'Added At' in df.columns:
+        added_at = pd.to_datetime(df['Added At'], errors='coerce', utc=True, format='ISO8601').dropna()
+        yearly = added_at.dt.year.value_counts()
+        monthly = added_at.dt.month.value_counts()
+    
+    return {
+        'preview': {
+            'total_duration_ms': total_ms,
+            'unique_artists': unique_artists,
+            'avg_popularity': round(popularity['mean'], 1),
+            'explicit_count': explicit_count
+        },
+        'stats': {
+            'total_tracks': total,
+            'unique_artists': unique_artists,
+            'total_duration': {'ms': total_ms, 'hours': round(hours, 2), 'days': round(days, 2)},
+            'popularity': {
+                'average': round(popularity['mean'], 2),
+                'median': round(popularity['median'], 2),
+                'min': int(popularity['min']),
+                'max': int(popularity['max'])
+            },
+            'explicit': {'count': explicit_count, 'percentage': explicit_pct}
+        },
+        'audio_features': {
+            'audio_features': {
+                # Coerced like predict_mood, so one bad cell can't fail the whole upload
+                col.lower(): round(pd.to_numeric(df[col], errors='coerce').mean(), 3)
+                for col in AUDIO_FEATURE_COLUMNS if col in df.columns
+            }
+        },
+        'explicit': {
+            'explicit_count': explicit_count,
+            'clean_count': total - explicit_count,
+            'percentage': explicit_pct
+        },
+        'mood_dist': {
+            'mood_distribution': {
+                mood: {'count': count, 'percentage': round((count / total) * 100, 2)}
+                for mood, count in mood_counts.items()
+            }
+        },
+        'popularity_dist': {
+            'distribution': {
+                k: {'count': v, 'percentage': round((v / total) * 100, 2)}
+                for k, v in popularity_counts.items()
+            }
+        },
+        'temporal': {
+            'yearly_trends': {str(k): v for k, v in yearly.items()},
+            'monthly_trends': {str(k): v for k, v in monthly.items()},
+            'total_tracks': total
         }
-        
-        return max(scores, key=scores.get)
-    except:
-        return 'Unknown'
+    }
 
 # ============================================================================
 # ENDPOINTS
@@ -61,274 +243,167 @@ def predict_mood(row):
 
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'healthy', 'data_loaded': df is not None}), 200
+    return jsonify({'status': 'healthy', 'data_loaded': df is not None, 'model_version': model_version}), 200
+
+
+def _save_upload(file):
+    """Stream an uploaded file to a temporary CSV in the upload folder"""
+    fd, path = tempfile.mkstemp(suffix='.csv', dir=app.config['UPLOAD_FOLDER'])
+    with os.fdopen(fd, 'wb') as fo:
+        shutil.copyfileobj(file.stream, fo, length=1 << 20)
+    return path
 
 
 @app.route('/upload', methods=['POST'])
 def upload():
-    global df
+    global df, _DATA_VERSION, SUMMARIES
     
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file'}), 400
+    
+    # Spool to disk and let Arrow read the file itself instead of
+    # holding the request body and the parsed frame in memory together
+    tmp_path = _save_upload(request.files['file'])
     try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file'}), 400
-        
-        file = request.files['file']
-        df = pd.read_csv(file)
+        # Multithreaded Arrow parser; ISO timestamps such as Added At come back as datetimes
+        uploaded = pd.read_csv(tmp_path, engine='pyarrow')
         
-        if df.empty:
+        if uploaded.empty:
             return jsonify({'error': 'Empty file'}), 400
         
         required = ['Track Name', 'Artist Name(s)', 'Duration (ms)', 'Popularity']
-        missing = [col for col in required if col not in df.columns]
+        missing = [col for col in required if col not in uploaded.columns]
         if missing:
             return jsonify({'error': f'Missing: {missing}'}), 400
         
-        # Add mood
-        df['Mood'] = df.apply(predict_mood, axis=1)
+        uploaded['Popularity'] = pd.to_numeric(uploaded['Popularity'], errors='coerce', downcast='integer')
         
-        total_ms = df['Duration (ms)'].sum()
+        for col in CATEGORY_COLUMNS:
+            if col in uploaded.columns:
+                uploaded[col] = uploaded[col].astype('category')
         
-        return jsonify({
-            'message': 'Success',
-            'rows': len(df),
-            'preview': {
-                'total_duration_ms': int(total_ms),
-                'unique_artists': int(df['Artist Name(s)'].nunique()),
-                'avg_popularity': round(float(df['Popularity'].mean()), 1),
-                'explicit_count': int(df['Explicit'].sum()) if 'Explicit' in df.columns else 0
-            }
-        }), 200
+        # Add mood
+        uploaded['Mood'] = predict_mood(uploaded)
+        summaries = _build_summaries(uploaded)
+        
+        # Keep the last accepted upload on disk
+        os.replace(tmp_path, os.path.join(app.config['UPLOAD_FOLDER'], 'latest.csv'))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
     
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    # Publish only fully processed data so requests served while an
+    # upload is parsing keep seeing the previous complete dataset
+    df, SUMMARIES = uploaded, summaries
+    _DATA_VERSION += 1
+    _CACHE.clear()
+    
+    return jsonify({
+        'message': 'Success',
+        'rows': len(df),
+        'preview': summaries['preview']
+    }), 200
 
 
 @app.route('/stats', methods=['GET'])
+@requires_df
 def stats():
-    global df
-    if df is None:
-        return jsonify({'error': 'No data'}), 400
-    
-    try:
-        total_ms = df['Duration (ms)'].sum()
-        hours = total_ms / 3600000
-        days = hours / 24
-        
-        return jsonify({
-            'total_tracks': len(df),
-            'unique_artists': int(df['Artist Name(s)'].nunique()),
-            'total_duration': {'ms': int(total_ms), 'hours': round(hours, 2), 'days': round(days, 2)},
-            'popularity': {
-                'average': round(float(df['Popularity'].mean()), 2),
-                'median': round(float(df['Popularity'].median()), 2),
-                'min': int(df['Popularity'].min()),
-                'max': int(df['Popularity'].max())
-            },
-            'explicit': {
-                'count': int(df['Explicit'].sum()) if 'Explicit' in df.columns else 0,
-                'percentage': round((df['Explicit'].sum() / len(df) * 100), 2) if 'Explicit' in df.columns else 0
-            }
-        }), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return jsonify(SUMMARIES['stats']), 200
 
 
 @app.route('/top-tracks', methods=['GET'])
+@requires_df
+@memoize_on_df
 def top_tracks():
-    global df
-    if df is None:
-        return jsonify({'error': 'No data'}), 400
+    n = request.args.get('n', 15, type=int)
     
-    try:
-        n = request.args.get('n', 15, type=int)
-        
-        # Sort by Popularity score (highest first), NOT by play count
-        df['Popularity'] = pd.to_numeric(df['Popularity'], errors='coerce')
-        top = df.nlargest(n, 'Popularity')[['Track Name', 'Artist Name(s)', 'Popularity']]
-        
-        result = []
-        for idx, row in top.iterrows():
-            result.append({
-                'track_name': str(row['Track Name']),
-                'artist': str(row['Artist Name(s)']),
-                'popularity': int(row['Popularity'])
-            })
-        
-        return jsonify({'top_tracks': result}), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    # Sort by Popularity score (highest first), NOT by play count
+    top = df.nlargest(n, 'Popularity')[['Track Name', 'Artist Name(s)', 'Popularity']]
+    
+    result = (
+        top.rename(columns={'Track Name': 'track_name', 'Artist Name(s)': 'artist', 'Popularity': 'popularity'})
+        .astype({'track_name': str, 'artist': str, 'popularity': int})
+        .to_dict(orient='records')
+    )
+    
+    return jsonify({'top_tracks': result}), 200
 
 
 @app.route('/top-artists', methods=['GET'])
+@requires_df
+@memoize_on_df
 def top_artists():
-    global df
-    if df is None:
-        return jsonify({'error': 'No data'}), 400
+    n = request.args.get('n', 12, type=int)
+    top = df['Artist Name(s)'].value_counts().head(n)
     
-    try:
-        n = request.args.get('n', 12, type=int)
-        top = df['Artist Name(s)'].value_counts().head(n)
-        
-        result = [
-            {'artist': artist, 'track_count': int(count), 'percentage': round((count / len(df)) * 100, 2)}
-            for artist, count in top.items()
-        ]
-        
-        return jsonify({'top_artists': result}), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    result = [
+        {'artist': artist, 'track_count': count, 'percentage': round((count / len(df)) * 100, 2)}
+        for artist, count in top.items()
+    ]
+    
+    return jsonify({'top_artists': result}), 200
 
 
 @app.route('/mood-distribution', methods=['GET'])
+@requires_df
 def mood_distribution():
-    global df
-    if df is None:
-        return jsonify({'error': 'No data'}), 400
-    
-    try:
-        mood_counts = df['Mood'].value_counts()
-        
-        result = {
-            mood: {'count': int(count), 'percentage': round((count / len(df)) * 100, 2)}
-            for mood, count in mood_counts.items()
-        }
-        
-        return jsonify({'mood_distribution': result}), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return jsonify(SUMMARIES['mood_dist']), 200
 
 
 @app.route('/genre-distribution', methods=['GET'])
+@requires_df
+@memoize_on_df
 def genre_distribution_endpoint():
     """Get genre distribution"""
-    global df
-    if df is None:
-        return jsonify({'error': 'No data'}), 400
+    # Errors propagate to on_error as a 500, which memoize_on_df never caches
+    if 'Genres' not in df.columns:
+        return jsonify({'genres': {}, 'genre_distribution': {}}), 200
     
-    try:
-        if 'Genres' not in df.columns:
-            return jsonify({'genres': {}, 'genre_distribution': {}}), 200
-        
-        all_genres = []
-        for genres_str in df['Genres']:
-            if pd.notna(genres_str) and str(genres_str).strip() and str(genres_str) != '':
-                genres_list = [g.strip() for g in str(genres_str).split(',') if g.strip()]
-                all_genres.extend(genres_list)
-        
-        if not all_genres:
-            return jsonify({'genres': {}, 'genre_distribution': {}}), 200
-        
-        genre_counts = Counter(all_genres)
-        sorted_genres = dict(sorted(genre_counts.items(), key=lambda x: x[1], reverse=True)[:15])
-        
-        result = {
-            'genres': sorted_genres,  # For homepage
-            'genre_distribution': {
-                g: {'count': int(c), 'percentage': round((int(c) / len(all_genres) * 100), 2)} 
-                for g, c in sorted_genres.items()
-            }
-        }
-        return jsonify(result), 200
-    except Exception as e:
-        print(f"Genre error: {str(e)}")
+    all_genres = df['Genres'].dropna().astype(str).str.split(',').explode().str.strip()
+    all_genres = all_genres[all_genres != '']
+    
+    if all_genres.empty:
         return jsonify({'genres': {}, 'genre_distribution': {}}), 200
+    
+    total = all_genres.shape[0]
+    genre_counts = all_genres.value_counts(sort=False).nlargest(15)
+    
+    result = {
+        'genres': genre_counts.to_dict(),  # For homepage
+        'genre_distribution': {
+            g: {'count': c, 'percentage': round((c / total * 100), 2)} 
+            for g, c in genre_counts.items()
+        }
+    }
+    return jsonify(result), 200
 
 
 @app.route('/temporal-analysis', methods=['GET'])
+@requires_df
 def temporal_analysis():
     """Yearly and monthly trends"""
-    global df
-    if df is None:
-        return jsonify({'error': 'No data'}), 400
-    
-    try:
-        if 'Added At' not in df.columns:
-            return jsonify({'yearly_trends': {}, 'monthly_trends': {}, 'total_tracks': len(df)}), 200
-        
-        df['Added At'] = pd.to_datetime(df['Added At'], errors='coerce')
-        df['Year'] = df['Added At'].dt.year
-        df['Month'] = df['Added At'].dt.month
-        
-        yearly = df['Year'].value_counts().to_dict()
-        monthly = df['Month'].value_counts().to_dict()
-        
-        return jsonify({
-            'yearly_trends': {str(k): v for k, v in yearly.items()},
-            'monthly_trends': {str(k): v for k, v in monthly.items()},
-            'total_tracks': len(df)
-        }), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return jsonify(SUMMARIES['temporal']), 200
 
 
 @app.route('/popularity-distribution', methods=['GET'])
+@requires_df
 def popularity_distribution():
     """Classify by popularity"""
-    global df
-    if df is None:
-        return jsonify({'error': 'No data'}), 400
-    
-    try:
-        def classify(pop):
-            if pop < 40:
-                return 'Low'
-            elif pop < 70:
-                return 'Medium'
-            else:
-                return 'High'
-        
-        df['Popularity_Class'] = df['Popularity'].apply(classify)
-        dist = df['Popularity_Class'].value_counts().to_dict()
-        
-        return jsonify({
-            'distribution': {
-                k: {'count': int(v), 'percentage': round((v / len(df)) * 100, 2)}
-                for k, v in dist.items()
-            }
-        }), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return jsonify(SUMMARIES['popularity_dist']), 200
 
 
 @app.route('/audio-features', methods=['GET'])
+@requires_df
 def audio_features():
     """Average audio features"""
-    global df
-    if df is None:
-        return jsonify({'error': 'No data'}), 400
-    
-    try:
-        features = {}
-        for col in ['Danceability', 'Energy', 'Valence', 'Acousticness', 'Speechiness', 'Instrumentalness', 'Liveness']:
-            if col in df.columns:
-                features[col.lower()] = round(float(df[col].mean()), 3)
-        
-        return jsonify({'audio_features': features}), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return jsonify(SUMMARIES['audio_features']), 200
 
 
 @app.route('/explicit-analysis', methods=['GET'])
+@requires_df
 def explicit_analysis():
     """Explicit content analysis"""
-    global df
-    if df is None:
-        return jsonify({'error': 'No data'}), 400
-    
-    try:
-        if 'Explicit' not in df.columns:
-            return jsonify({'explicit_count': 0, 'clean_count': len(df), 'percentage': 0}), 200
-        
-        explicit_count = int(df['Explicit'].sum())
-        clean_count = len(df) - explicit_count
-        
-        return jsonify({
-            'explicit_count': explicit_count,
-            'clean_count': clean_count,
-            'percentage': round((explicit_count / len(df)) * 100, 2)
-        }), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return jsonify(SUMMARIES['explicit']), 200
 
 
 @app.route('/start-rating-session', methods=['GET'])
@@ -344,17 +419,22 @@ def start_rating_session():
         sample_df = recommender_df.sample(n=sample_size)
         
         # Format response
-        songs = []
-        for idx, row in sample_df.iterrows():
-            songs.append({
-                'df_index': int(idx),
-                'Track Name': str(row.get('track_name', 'Unknown')),
-                'Artist Name(s)': str(row.get('artists', 'Unknown')),
-                'track_name': str(row.get('track_name', 'Unknown')),
-                'artists': str(row.get('artists', 'Unknown')),
-                'popularity': int(row.get('popularity', 0)) if pd.notna(row.get('popularity')) else 0,
-                'duration_ms': int(row.get('duration_ms', 0)) if pd.notna(row.get('duration_ms')) else 0
-            })
+        sample = sample_df.reindex(columns=['track_name', 'artists', 'popularity', 'duration_ms'])
+        records = (
+            sample.fillna({'track_name': 'Unknown', 'artists': 'Unknown', 'popularity': 0, 'duration_ms': 0})
+            .astype({'track_name': str, 'artists': str, 'popularity': int, 'duration_ms': int})
+            .to_dict(orient='records')
+        )
+        
+        songs = [
+            {
+                'df_index': df_index,
+                'Track Name': record['track_name'],
+                'Artist Name(s)': record['artists'],
+                **record
+            }
+            for df_index, record in zip(sample_df.index.tolist(), records)
+        ]
         
         return jsonify({'songs': songs}), 200
     except Exception as e:
@@ -371,10 +451,14 @@ recommender_data = None
 recommender_df = None
 scaled_features = None
 feature_cols = None
+# Identifies the loaded recommender artifacts so clients can invalidate cached results
+model_version = None
+
+RECOMMENDER_FILES = ['recommender_knn.pkl', 'recommender_scaler.pkl', 'recommender_data.pkl']
 
 def load_recommender_models():
     """Load all models needed for the recommender"""
-    global knn_model, scaler, recommender_data, recommender_df, scaled_features, feature_cols
+    global knn_model, scaler, recommender_data, recommender_df, scaled_features, feature_cols, model_version
     try:
         # Assuming the script is run from the project root
         ml_dir = 'ml'
@@ -390,8 +474,18 @@ def load_recommender_models():
             recommender_df = recommender_data['df']
             # Normalize columns to lower case to avoid issues
             recommender_df.columns = recommender_df.columns.str.lower()
-            scaled_features = recommender_data['scaled_features']
+            # float32 halves the bytes read per profile/neighbour lookup
+            scaled_features = np.ascontiguousarray(recommender_data['scaled_features'], dtype=np.float32)
+            # Drop the float64 original so only the float32 copy stays resident
+            recommender_data['scaled_features'] = scaled_features
             feature_cols = recommender_data['feature_cols']
+        
+        # The pickled model carries its own float64 copy of the training data;
+        # refit with the same parameters so kneighbors indexes the float32 array
+        knn_model = NearestNeighbors(**knn_model.get_params()).fit(scaled_features)
+        
+        # Newest artifact mtime; changes whenever train_recommender.py refits
+        model_version = str(max(os.stat(os.path.join(ml_dir, name)).st_mtime_ns for name in RECOMMENDER_FILES))
             
         print("Recommender models loaded successfully.")
         return True
@@ -417,49 +511,38 @@ def submit_ratings_and_recommend():
             return jsonify({'error': 'No ratings provided'}), 400
 
         # Create a user profile vector
-        rated_features = []
-        weights = []
+        valid = [r for r in ratings if r.get('df_index') is not None and r.get('rating') is not None]
+        locs = recommender_df.index.get_indexer([r['df_index'] for r in valid])
+        found = locs >= 0
         
-        for r in ratings:
-            df_index = r.get('df_index')
-            rating = r.get('rating')
-            
-            if df_index is not None and rating is not None and df_index in recommender_df.index:
-                loc = recommender_df.index.get_loc(df_index)
-                rated_features.append(scaled_features[loc])
-                weights.append(rating - 3)  # Center ratings (1-5 -> -2-2)
+        rated_features = scaled_features[locs[found]]
+        weights = np.array([r['rating'] for r in valid], dtype=np.float32)[found] - 3  # Center ratings (1-5 -> -2-2)
 
-        if not rated_features:
+        if not found.any():
             return jsonify({'error': 'Could not find any of the rated songs in the dataset'}), 400
         
         # Calculate weighted average to get user's taste profile
         user_profile = np.average(rated_features, axis=0, weights=weights).reshape(1, -1)
         
-        # Find nearest neighbors
-        distances, indices = knn_model.kneighbors(user_profile, n_neighbors=top_k * 2)
+        # Find nearest neighbors; each rated song can displace at most one result
+        rated_df_indices = [r['df_index'] for r in ratings]
+        n_neighbors = min(top_k + len(set(rated_df_indices)), len(recommender_df))
+        distances, indices = knn_model.kneighbors(user_profile, n_neighbors=n_neighbors)
         
         # Format recommendations, excluding songs they've already rated
-        rated_df_indices = {r['df_index'] for r in ratings}
-        recommendations = []
-        
-        dist_iter = iter(distances.flatten())
-
-        for i in indices.flatten():
-            if len(recommendations) >= top_k:
-                break
-            
-            dist = next(dist_iter)
-            rec_df_index = recommender_df.index[i]
-            if rec_df_index not in rated_df_indices:
-                song = recommender_df.iloc[i]
-                recommendations.append({
-                    'track_name': song.get('track_name', 'Unknown'),
-                    'artists': song.get('artists', 'Unknown'),
-                    'year': int(song.get('year', 0)),
-                    'popularity': int(song.get('popularity', 0)),
-                    'track_genre': song.get('track_genre', 'N/A'),
-                    'similarity_score': 1 - dist # Convert distance to similarity
-                })
+        idxs = indices.ravel()
+        dists = distances.ravel()
+        keep = np.flatnonzero(~np.isin(recommender_df.index.values[idxs], rated_df_indices))[:top_k]
+        
+        songs = recommender_df.iloc[idxs[keep]].reindex(
+            columns=['track_name', 'artists', 'year', 'popularity', 'track_genre']
+        )
+        recommendations = (
+            songs.fillna({'track_name': 'Unknown', 'artists': 'Unknown', 'year': 0, 'popularity': 0, 'track_genre': 'N/A'})
+            .astype({'year': int, 'popularity': int})
+            .assign(similarity_score=1 - dists[keep])  # Convert distance to similarity
+            .to_dict(orient='records')
+        )
 
         return jsonify({
             'recommendations': recommendations,
@@ -476,4 +559,4 @@ def submit_ratings_and_recommend():
 if __name__ == '__main__':
     load_recommender_models()
     print("\n🎵 SPOTIFY WRAPPED API — Starting on http://localhost:5000\n")
-    app.run(debug=False, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=False, host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
@@ -59,8 +59,9 @@ print(f"Extracted {len(feature_cols)} audio features")
 
 print("\n[3/5] Scaling features...")
 scaler = StandardScaler()
-scaled_features = scaler.fit_transform(features)
-print("Features normalized using StandardScaler")
+# float32 is ample precision for audio features and halves KNN memory traffic
+scaled_features = np.ascontiguousarray(scaler.fit_transform(features), dtype=np.float32)
+print("Features normalized using StandardScaler (float32)")
 
 print("\n[4/5] Training KNN model...")
 knn = NearestNeighbors(n_neighbors=50, metric='euclidean', algorithm='auto')
@@ -3,6 +3,8 @@ Frontend Configuration — Red, Black, Grey, White Flat Palette
 Modern, sleek, minimal but exciting
 """
 
+from types import MappingProxyType
+
 # API Configuration
 API_BASE_URL = "http://localhost:5000"
 
@@ -113,4 +115,17 @@ WRAPPED_CARD_CSS = """
         z-index: 2;
     }
 </style>
-"""
\ No newline at end of file
+"""
+
+# Wrapped page feature sequence (immutable, shared by every rerun)
+WRAPPED_FEATURES = tuple(MappingProxyType(feature) for feature in (
+    {'id': 'top_tracks', 'title': '🎵 Your Top Tracks', 'description': 'Songs you loved most'},
+    {'id': 'top_artists', 'title': '🎤 Top Artists', 'description': 'Your favorite creators'},
+    {'id': 'temporal', 'title': '📅 Songs Over Time', 'description': 'Your listening journey'},
+    {'id': 'audio_features', 'title': '🎛️ Audio Profile', 'description': 'Your sound characteristics'},
+    {'id': 'mood_analysis', 'title': '😊 Mood Analysis', 'description': 'Your emotional landscape'},
+    {'id': 'popularity', 'title': '⭐ Popularity Style', 'description': 'Mainstream or underground?'},
+    {'id': 'mood_radar', 'title': '📊 Mood Radar', 'description': 'Emotional profile at a glance'},
+    {'id': 'genre', 'title': '🎸 Genre Explorer', 'description': 'Your musical diversity'},
+    {'id': 'explicit', 'title': '🔞 Explicit Content', 'description': 'Rating your playlist'},
+))
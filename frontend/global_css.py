@@ -1,6 +1,9 @@
 import streamlit as st
+from functools import lru_cache
 
-def apply_global_css():
+@lru_cache(maxsize=None)
+def _global_css_html():
+    """Build the stylesheet once per process; it never changes between reruns"""
     # Define our theme colors
     purple_main = "#8c00ff"
     purple_glow = "#c8b3ff"
@@ -9,7 +12,7 @@ def apply_global_css():
     sidebar_black = "#000000"
     text_white = "#ffffff"
 
-    st.markdown(f"""
+    return f"""
     <style>
     @import url('https://fonts.googleapis.com/css2?family=Montserrat:wght@400;700;900&display=swap');
 
@@ -101,6 +104,25 @@ def apply_global_css():
         color: {text_white} !important;
     }}
 
+    /* Recommendation metrics laid out like st.metric, in one markdown block */
+    .rec-metrics {{
+        display: flex;
+        gap: 1rem;
+        margin: 0.75rem 0 1.5rem 0;
+    }}
+    .rec-metric {{
+        flex: 1;
+        display: flex;
+        flex-direction: column;
+    }}
+    .rec-metric-label {{
+        font-size: 0.875rem;
+    }}
+    .rec-metric-value {{
+        color: {purple_glow} !important;
+        font-size: 2.25rem;
+    }}
+
     /* Style for the Navigation Icon Buttons specifically */
     [data-testid="stSidebar"] [data-testid="stVerticalBlock"] div.stButton > button {{
         font-size: 1.5rem !important;
@@ -108,4 +130,8 @@ def apply_global_css():
     }}
 
     </style>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    """
+
+def apply_global_css():
+    # Streamlit drops elements that are not re-emitted, so the style block is sent on every full run
+    st.markdown(_global_css_html(), unsafe_allow_html=True)
@@ -0,0 +1,27 @@
+"""
+Sidebar navigation shared by the home page and both sub-pages
+"""
+
+from typing import Literal
+
+import streamlit as st
+
+# (target, icon, help text, page path relative to streamlit_app.py)
+NAV_ITEMS = (
+    ('home', '🏠', 'Home Page', 'streamlit_app.py'),
+    ('wrapped', '🎵', 'Your Wrapped', 'pages/wrapped_page.py'),
+    ('rec', '🎯', 'Recommendations', 'pages/recommendations_page.py'),
+)
+
+def render_nav(active: Literal['home', 'wrapped', 'rec']):
+    """Render the NAVIGATE buttons; the active page reruns, the others switch page"""
+    st.sidebar.markdown("### 🧭 NAVIGATE")
+    cols = st.sidebar.columns(len(NAV_ITEMS))
+
+    for col, (target, icon, label, page) in zip(cols, NAV_ITEMS):
+        with col:
+            if st.button(icon, help=label, use_container_width=True, key=f"nav_{target}_{active}"):
+                if target == active:
+                    st.session_state['current_page'] = target
+                    st.rerun()
+                st.switch_page(page)
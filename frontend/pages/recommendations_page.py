@@ -4,13 +4,20 @@ Rate 10 songs and get personalized recommendations
 """
 
 import streamlit as st
+import hashlib
+import orjson
+import os
 import sys
+import tempfile
+from collections import namedtuple
 from pathlib import Path
 
-sys.path.append(str(Path(__file__).parent.parent))
+frontend_dir = str(Path(__file__).parent.parent)
+if frontend_dir not in sys.path:
+    sys.path.append(frontend_dir)
 
-from utils.api_client import APIClient
-from frontend.frontend_config import COLORS
+from utils.api_client import get_api
+from utils.session_manager import SessionManager
 
 # Page config
 st.set_page_config(
@@ -20,8 +27,11 @@ st.set_page_config(
 )
 
 from frontend.global_css import apply_global_css
+from frontend.navigation import render_nav
 apply_global_css()
 
+SessionManager.prune_expired()
+
 # ============================================================================
 # SIDEBAR NAVIGATION
 # ============================================================================
@@ -30,20 +40,7 @@ st.sidebar.markdown(f"# 🎯 Recommendations")
 st.sidebar.markdown("### Rate songs & get personalized picks")
 st.sidebar.divider()
 
-st.sidebar.markdown("### 🧭 NAVIGATE")
-nav_col1, nav_col2, nav_col3 = st.sidebar.columns(3)
-
-with nav_col1:
-    if st.button("🏠", help="Home Page", use_container_width=True, key="nav_home_rec"):
-        st.switch_page("streamlit_app.py")
-
-with nav_col2:
-    if st.button("🎵", help="Your Wrapped", use_container_width=True, key="nav_wrapped_rec"):
-        st.switch_page("pages/wrapped_page.py")
-
-with nav_col3:
-    if st.button("🎯", help="Recommendations", use_container_width=True, key="nav_rec_rec"):
-        st.rerun()
+render_nav("rec")
 
 st.sidebar.divider()
 st.sidebar.info("⭐ Rate 10 songs to get AI recommendations")
@@ -53,7 +50,10 @@ if st.sidebar.button("🗑️ CLEAR SESSION", use_container_width=True):
     st.session_state.clear()
     st.rerun()
 
-api = APIClient()
+api = get_api()
+
+# A song offered for rating, normalized once when the rating session starts
+Song = namedtuple('Song', 'df_index track_name artists')
 
 # Initialize session state
 if 'rating_phase' not in st.session_state:
@@ -63,11 +63,10 @@ if 'current_song_index' not in st.session_state:
 if 'songs_to_rate' not in st.session_state:
     st.session_state.songs_to_rate = None
 if 'user_ratings' not in st.session_state:
-    st.session_state.user_ratings = {}
+    st.session_state.user_ratings = []
 if 'recommendations' not in st.session_state:
     st.session_state.recommendations = None
-if 'current_rating' not in st.session_state:
-    st.session_state.current_rating = 0
+SessionManager.touch('rating_session')
 
 
 def reset_session():
@@ -75,9 +74,8 @@ def reset_session():
     st.session_state.rating_phase = True
     st.session_state.current_song_index = 0
     st.session_state.songs_to_rate = None
-    st.session_state.user_ratings = {}
+    st.session_state.user_ratings = []
     st.session_state.recommendations = None
-    st.session_state.current_rating = 0
 
 
 def load_songs_to_rate():
@@ -86,38 +84,34 @@ def load_songs_to_rate():
         result = api.start_rating_session()
         
         if result and 'songs' in result:
-            songs = result['songs']
-            # Normalize field names
-            for song in songs:
-                song['artists'] = song.get('Artist Name(s)', song.get('artists', 'Unknown'))
-                song['track_name'] = song.get('Track Name', song.get('track_name', 'Unknown'))
+            # Normalize field names once into immutable records
+            songs = [
+                Song(
+                    s['df_index'],
+                    s.get('Track Name') or s.get('track_name', 'Unknown'),
+                    s.get('Artist Name(s)') or s.get('artists', 'Unknown'),
+                )
+                for s in result['songs']
+            ]
             
             st.session_state.songs_to_rate = songs
-            st.session_state.user_ratings = {}
+            st.session_state.user_ratings = [None] * len(songs)
             st.session_state.current_song_index = 0
-            st.session_state.current_rating = 0
             return True
         return False
 
 
 def render_star_rating(song_id, current_rating):
-    """Render interactive star rating"""
+    """Render interactive star rating; returns 1-5, or None until a star is picked"""
     st.markdown("### ⭐ Rate this song (1-5 stars)")
     
-    cols = st.columns(5)
-    rating = current_rating
-    
-    for i, col in enumerate(cols, 1):
-        with col:
-            if st.button(
-                "⭐" if i <= current_rating else "☆",
-                key=f"star_{song_id}_{i}",
-                help=f"Rate {i} star{'s' if i > 1 else ''}"
-            ):
-                rating = i
-                st.session_state.current_rating = i
-    
-    return rating
+    # st.feedback reports the selected star as a 0-4 index
+    selected = st.feedback(
+        "stars",
+        key=f"stars_{song_id}",
+        default=current_rating - 1 if current_rating else None,
+    )
+    return None if selected is None else selected + 1
 
 
 def render_rating_phase():
@@ -140,15 +134,15 @@ def render_rating_phase():
     # Song display
     st.markdown(f"""
     <div class='song-card'>
-        <h2>{current_song.get('track_name', 'Unknown')}</h2>
-        <p><strong>Artist:</strong> {current_song.get('artists', 'Unknown')}</p>
+        <h2>{current_song.track_name}</h2>
+        <p><strong>Artist:</strong> {current_song.artists}</p>
         <p style='color: #b3b3b3;'>Song {current_idx + 1} of {len(songs)}</p>
     </div>
     """, unsafe_allow_html=True)
     
-    # Rating
-    st.markdown("### ⭐ Rate this song")
-    st.session_state.current_rating = st.slider("", 1, 5, st.session_state.current_rating, key=f"rating_{current_idx}")
+    # Rating (user_ratings is the source of truth; the widget only keeps state while it is on screen)
+    saved = st.session_state.user_ratings[current_idx]
+    rating = render_star_rating(current_song.df_index, saved['rating'] if saved else 0)
     
     # Navigation
     col1, col2, col3 = st.columns([1, 1, 1])
@@ -159,23 +153,19 @@ def render_rating_phase():
             st.rerun()
     
     with col2:
-        can_proceed = st.session_state.current_rating > 0
+        can_proceed = rating is not None
         button_text = "✅ Submit & Get Recommendations" if is_last_song else "Next ➡️"
         
         if st.button(button_text, key="next_btn", use_container_width=True, disabled=not can_proceed):
             st.session_state.user_ratings[current_idx] = {
-                'df_index': current_song['df_index'],
-                'rating': st.session_state.current_rating
+                'df_index': current_song.df_index,
+                'rating': rating
             }
             
             if is_last_song:
                 submit_ratings()
             else:
                 st.session_state.current_song_index += 1
-                if st.session_state.current_song_index in st.session_state.user_ratings:
-                    st.session_state.current_rating = st.session_state.user_ratings[st.session_state.current_song_index]['rating']
-                else:
-                    st.session_state.current_rating = 0
                 st.rerun()
     
     with col3:
@@ -184,29 +174,90 @@ def render_rating_phase():
             st.rerun()
     
     # Show rated songs summary
-    if st.session_state.user_ratings:
-        with st.expander(f"✅ Rated Songs ({len(st.session_state.user_ratings)}/10)"):
-            for idx, rating_data in st.session_state.user_ratings.items():
-                if idx < len(songs):
-                    song = songs[idx]
+    rated_count = sum(r is not None for r in st.session_state.user_ratings)
+    if rated_count:
+        with st.expander(f"✅ Rated Songs ({rated_count}/10)"):
+            for song, rating_data in zip(songs, st.session_state.user_ratings):
+                if rating_data is not None:
                     stars = "⭐" * rating_data['rating']
-                    st.markdown(f"**{song['track_name']}** by {song['artists']} - {stars}")
+                    st.markdown(f"**{song.track_name}** by {song.artists} - {stars}")
+
+
+# Recommendations already computed for a rating set, reused across sessions and restarts
+RECS_CACHE_DIR = Path.home() / ".spotify_wrapped" / "recs"
+RECS_CACHE_MAX_FILES = 200
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_model_version():
+    """Version of the backend's loaded recommender, or None if it can't be determined"""
+    health = api.health_check() or {}
+    return health.get('model_version')
+
+
+def _prune_recs_cache(model_version):
+    """Drop results from other model versions and keep at most RECS_CACHE_MAX_FILES of the newest"""
+    files = []
+    for path in RECS_CACHE_DIR.glob("*.json"):
+        if not path.name.startswith(f"{model_version}-"):
+            path.unlink(missing_ok=True)
+        else:
+            files.append(path)
+    if len(files) > RECS_CACHE_MAX_FILES:
+        files.sort(key=lambda p: p.stat().st_mtime)
+        for path in files[:-RECS_CACHE_MAX_FILES]:
+            path.unlink(missing_ok=True)
+
+
+@st.cache_data(show_spinner=False, max_entries=RECS_CACHE_MAX_FILES)
+def fetch_recommendations(rating_key, model_version, top_k=10):
+    """Recommendations for a sorted tuple of (df_index, rating) pairs, persisted to disk per model version.
+    Without a model version nothing is read from or written to disk."""
+    digest = hashlib.sha1(orjson.dumps([rating_key, top_k])).hexdigest()
+    path = RECS_CACHE_DIR / f"{model_version}-{digest}.json"
+    if model_version is not None:
+        try:
+            return orjson.loads(path.read_bytes())
+        except FileNotFoundError:
+            pass
+        except (OSError, orjson.JSONDecodeError):
+            # Truncated or unreadable entry: treat it as a miss and refetch
+            path.unlink(missing_ok=True)
+    
+    ratings = [{'df_index': df_index, 'rating': rating} for df_index, rating in rating_key]
+    result = api.submit_ratings_and_recommend(ratings, top_k=top_k)
+    if not result:
+        # Raising keeps the failure out of st.cache_data so the next submit retries
+        raise RuntimeError("Recommendation request failed")
+    
+    if model_version is not None:
+        RECS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename, so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=RECS_CACHE_DIR)
+        with os.fdopen(fd, 'wb') as fo:
+            fo.write(orjson.dumps(result))
+        os.replace(tmp_path, path)
+        _prune_recs_cache(model_version)
+    return result
 
 
 def submit_ratings():
     """Submit ratings and get recommendations"""
     with st.spinner("🎵 Generating your personalized recommendations..."):
-        # Convert ratings dict to list format required by API
-        ratings_list = [
-            st.session_state.user_ratings[i] 
-            for i in range(len(st.session_state.songs_to_rate))
-        ]
+        ratings_list = st.session_state.user_ratings
+        if any(r is None for r in ratings_list):
+            st.error("Please rate every song before submitting.")
+            return
         
-        # Call API
-        result = api.submit_ratings_and_recommend(ratings_list, top_k=10)
+        rating_key = tuple(sorted((r['df_index'], r['rating']) for r in ratings_list))
+        try:
+            result = fetch_recommendations(rating_key, get_model_version(), top_k=10)
+        except RuntimeError:
+            result = None
         
         if result:
-            st.session_state.recommendations = result
+            # Stored compressed; only render_recommendations_phase unpacks it
+            SessionManager.store_compressed('recommendations', result)
             st.session_state.rating_phase = False
             st.rerun()
         else:
@@ -223,7 +274,7 @@ def render_recommendations_phase():
         st.error("No recommendations available")
         return
     
-    recs = st.session_state.recommendations
+    recs = SessionManager.load_compressed('recommendations')
     
     # Show summary
     st.success(f"✅ Found {recs['count']} personalized recommendations!")
@@ -231,30 +282,34 @@ def render_recommendations_phase():
     
     st.markdown("### 🎧 Your Recommended Tracks")
     
-    # Display recommendations
+    # Display recommendations as a single markdown block
+    parts = []
     for i, rec in enumerate(recs['recommendations'], 1):
-        st.markdown(f"""
+        metrics = []
+        if 'year' in rec:
+            metrics.append(("Year", rec['year']))
+        if 'popularity' in rec:
+            metrics.append(("Popularity", f"{rec['popularity']}/100"))
+        if 'similarity_score' in rec and rec['similarity_score']:
+            match_pct = rec['similarity_score'] * 100
+            metrics.append(("Match", f"{match_pct:.1f}%"))
+        metric_html = "".join(
+            f"<div class='rec-metric'><span class='rec-metric-label'>{label}</span>"
+            f"<span class='rec-metric-value'>{value}</span></div>"
+            for label, value in metrics
+        )
+        
+        parts.append(f"""
         <div class='rec-card'>
             <h3 style='margin: 0 0 10px 0;'>#{i} {rec['track_name']}</h3>
             <p style='margin: 5px 0; font-size: 16px;'><strong>Artist:</strong> {rec['artists']}</p>
             <p style='margin: 5px 0; font-size: 14px; color: #b3b3b3;'><strong>Genre:</strong> {rec.get('track_genre', 'N/A')}</p>
         </div>
-        """, unsafe_allow_html=True)
-        
-        # Additional info
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            if 'year' in rec:
-                st.metric("Year", rec['year'])
-        with col2:
-            if 'popularity' in rec:
-                st.metric("Popularity", f"{rec['popularity']}/100")
-        with col3:
-            if 'similarity_score' in rec and rec['similarity_score']:
-                match_pct = rec['similarity_score'] * 100
-                st.metric("Match", f"{match_pct:.1f}%")
-        
-        st.markdown("---")
+        <div class='rec-metrics'>{metric_html}</div>
+        <hr>
+        """)
+    
+    st.markdown("\n".join(parts), unsafe_allow_html=True)
     
     # Start over button
     st.markdown("<br>", unsafe_allow_html=True)
@@ -5,14 +5,19 @@ Navigate through your personalized music analysis with rich visualizations
 
 import streamlit as st
 import sys
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import plotly.graph_objects as go
 
-sys.path.append(str(Path(__file__).parent.parent))
+frontend_dir = str(Path(__file__).parent.parent)
+if frontend_dir not in sys.path:
+    sys.path.append(frontend_dir)
 
-from utils.api_client import APIClient
-from utils.visualizations import Visualizer
-from frontend.frontend_config import WRAPPED_CARD_CSS, COLORS
+from utils.api_client import get_api
+from utils.visualizations import PLOT_CONFIG, STATIC_PLOT_CONFIG, cached_plot
+from utils.session_manager import SessionManager
+from frontend.frontend_config import WRAPPED_CARD_CSS, WRAPPED_FEATURES as FEATURES
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Page config
 st.set_page_config(
@@ -22,8 +27,11 @@ st.set_page_config(
 )
 
 from frontend.global_css import apply_global_css
+from frontend.navigation import render_nav
 apply_global_css()
 
+SessionManager.prune_expired()
+
 # Apply theme
 st.markdown(WRAPPED_CARD_CSS, unsafe_allow_html=True)
 
@@ -35,20 +43,7 @@ st.sidebar.markdown(f"# 🎵 Spotify Wrapped")
 st.sidebar.markdown("### Your listening story, visualized.")
 st.sidebar.divider()
 
-st.sidebar.markdown("### 🧭 NAVIGATE")
-nav_col1, nav_col2, nav_col3 = st.sidebar.columns(3)
-
-with nav_col1:
-    if st.button("🏠", help="Home Page", use_container_width=True, key="nav_home_wrapped"):
-        st.switch_page("streamlit_app.py")
-
-with nav_col2:
-    if st.button("🎵", help="Your Wrapped", use_container_width=True, key="nav_wrapped_wrapped"):
-        st.rerun()
-
-with nav_col3:
-    if st.button("🎯", help="Recommendations", use_container_width=True, key="nav_rec_wrapped"):
-        st.switch_page("pages/recommendations_page.py")
+render_nav("wrapped")
 
 st.sidebar.divider()
 st.sidebar.info("📋 Explore your personalized music analytics")
@@ -58,31 +53,49 @@ if st.sidebar.button("🗑️ CLEAR SESSION", use_container_width=True):
     st.session_state.clear()
     st.rerun()
 
-api = APIClient()
-viz = Visualizer()
-
-# Features to display
-FEATURES = [
-    {'id': 'top_tracks', 'title': '🎵 Your Top Tracks', 'description': 'Songs you loved most'},
-    {'id': 'top_artists', 'title': '🎤 Top Artists', 'description': 'Your favorite creators'},
-    {'id': 'temporal', 'title': '📅 Songs Over Time', 'description': 'Your listening journey'},
-    {'id': 'audio_features', 'title': '🎛️ Audio Profile', 'description': 'Your sound characteristics'},
-    {'id': 'mood_analysis', 'title': '😊 Mood Analysis', 'description': 'Your emotional landscape'},
-    {'id': 'popularity', 'title': '⭐ Popularity Style', 'description': 'Mainstream or underground?'},
-    {'id': 'mood_radar', 'title': '📊 Mood Radar', 'description': 'Emotional profile at a glance'},
-    {'id': 'genre', 'title': '🎸 Genre Explorer', 'description': 'Your musical diversity'},
-    {'id': 'explicit', 'title': '🔞 Explicit Content', 'description': 'Rating your playlist'},
-]
+api = get_api()
 
 def safe_api_call(func, *args, **kwargs):
-    """Safely call API and handle errors"""
+    """Safely call API and handle errors; None means the call failed"""
     try:
-        result = func(*args, **kwargs)
-        return result if result else {}
+        return func(*args, **kwargs)
     except Exception as e:
         st.error(f"⚠️ Error loading data: {str(e)}")
         return None
 
+# One call per backend endpoint; mood_analysis and mood_radar share the mood distribution
+PREFETCH = {
+    'top_tracks': lambda: api.get_top_tracks(n=15),
+    'top_artists': lambda: api.get_top_artists(n=12),
+    'temporal': api.get_temporal_analysis,
+    'audio_features': api.get_audio_features,
+    'mood_distribution': api.get_mood_distribution,
+    'popularity': api.get_popularity_distribution,
+    'genre': api.get_genre_distribution,
+    'explicit': api.get_explicit_analysis,
+}
+FEATURE_SOURCE = {'mood_analysis': 'mood_distribution', 'mood_radar': 'mood_distribution'}
+
+def prefetch_features():
+    """Fetch every feature endpoint concurrently and cache the results in session state.
+    Empty results are cached too, so empty panels never re-hit the backend for the same upload;
+    failed fetches are kept as None and only those endpoints are retried on the next render."""
+    SessionManager.touch('wrapped')
+    upload_id = (st.session_state.get('upload_info') or {}).get('id')
+    cached = st.session_state.get('feature_cache')
+    results = cached[1] if cached is not None and cached[0] == upload_id else {}
+    
+    missing = [key for key in PREFETCH if results.get(key) is None]
+    if missing:
+        # Workers inherit the script context so API errors still surface via st.error
+        ctx = get_script_run_ctx()
+        with ThreadPoolExecutor(max_workers=len(missing), initializer=add_script_run_ctx, initargs=(None, ctx)) as pool:
+            futures = {key: pool.submit(safe_api_call, PREFETCH[key]) for key in missing}
+            results = {**results, **{key: fut.result() for key, fut in futures.items()}}
+        st.session_state['feature_cache'] = (upload_id, results)
+    
+    return {f['id']: results[FEATURE_SOURCE.get(f['id'], f['id'])] for f in FEATURES}
+
 def render_feature(feature_idx):
     """Render individual feature with visualizations"""
     if feature_idx >= len(FEATURES):
@@ -90,36 +103,36 @@ def render_feature(feature_idx):
     
     feature = FEATURES[feature_idx]
     feature_id = feature['id']
+    data = prefetch_features().get(feature_id)
     
     # ---------- TOP TRACKS ----------
     if feature_id == "top_tracks":
-        data = safe_api_call(api.get_top_tracks, n=15)
         if data:
             tracks = data.get('top_tracks', [])
             col1, col2 = st.columns([1.5, 1])
             
             with col1:
-                fig = viz.plot_top_tracks(tracks)
-                st.plotly_chart(fig, use_container_width=True)
+                fig = cached_plot('plot_top_tracks', tracks)
+                st.plotly_chart(fig, use_container_width=True, config=PLOT_CONFIG, key=f"chart_{feature_id}")
             
             with col2:
                 st.subheader("📍 Track Stats")
                 total_tracks = len(tracks)
-                avg_popularity = sum([t.get('popularity', 0) for t in tracks]) / total_tracks if tracks else 0
+                pops = np.fromiter((t.get('popularity', 0) for t in tracks), dtype=np.float32, count=total_tracks)
+                avg_popularity = float(pops.mean()) if pops.size else 0
                 st.metric("Total Tracks", total_tracks)
                 st.metric("Avg Popularity", f"{avg_popularity:.0f}")
         return
     
     # ---------- TOP ARTISTS ----------
     elif feature_id == "top_artists":
-        data = safe_api_call(api.get_top_artists, n=12)
         if data:
             artists = data.get('top_artists', [])
             col1, col2 = st.columns([1.5, 1])
             
             with col1:
-                fig = viz.plot_top_artists(artists)
-                st.plotly_chart(fig, use_container_width=True)
+                fig = cached_plot('plot_top_artists', artists)
+                st.plotly_chart(fig, use_container_width=True, config=PLOT_CONFIG, key=f"chart_{feature_id}")
             
             with col2:
                 st.subheader("🎤 Artist Stats")
@@ -131,15 +144,14 @@ def render_feature(feature_idx):
     
     # ---------- TEMPORAL ANALYSIS ----------
     elif feature_id == "temporal":
-        data = safe_api_call(api.get_temporal_analysis)
         if data:
             col1, col2 = st.columns([1.5, 1])
             
             with col1:
                 yearly = data.get("yearly_trends", {})
                 monthly = data.get("monthly_trends", {})
-                fig = viz.plot_temporal_trends(yearly, monthly)
-                st.plotly_chart(fig, use_container_width=True)
+                fig = cached_plot('plot_temporal_trends', yearly, monthly)
+                st.plotly_chart(fig, use_container_width=True, config=PLOT_CONFIG, key=f"chart_{feature_id}")
             
             with col2:
                 st.subheader("📅 Timeline")
@@ -150,16 +162,10 @@ def render_feature(feature_idx):
     
     # ---------- AUDIO FEATURES ----------
     elif feature_id == "audio_features":
-        data = safe_api_call(api.get_audio_features)
         if data:
+            # Keys are already lowercased by APIClient.get_audio_features
             audio = data.get('audio_features') or {}
             
-            # Robust normalization: handle case, whitespace for ALL keys
-            for k in list(audio.keys()):
-                clean_k = k.strip().lower()
-                if clean_k not in audio:
-                    audio[clean_k] = audio[k]
-            
             # Check if audio features are present and non-zero
             has_data = any(float(audio.get(k) or 0) > 0 for k in ['danceability', 'energy', 'valence'])
             
@@ -173,8 +179,8 @@ def render_feature(feature_idx):
             col1, col2 = st.columns([1.5, 1])
             
             with col1:
-                fig = viz.plot_audio_features_radar({'audio_features': audio})
-                st.plotly_chart(fig, use_container_width=True)
+                fig = cached_plot('plot_audio_features_radar', {'audio_features': audio})
+                st.plotly_chart(fig, use_container_width=True, config=PLOT_CONFIG, key=f"chart_{feature_id}")
             
             with col2:
                 st.subheader("🎛️ Sound Profile")
@@ -185,14 +191,13 @@ def render_feature(feature_idx):
     
     # ---------- MOOD ANALYSIS ----------
     elif feature_id == "mood_analysis":
-        data = safe_api_call(api.get_mood_distribution)
         if data:
             mood_dist = data.get('mood_distribution', {})
             col1, col2 = st.columns([1.5, 1])
             
             with col1:
-                fig = viz.plot_mood_distribution(mood_dist)
-                st.plotly_chart(fig, use_container_width=True)
+                fig = cached_plot('plot_mood_distribution', mood_dist)
+                st.plotly_chart(fig, use_container_width=True, config=PLOT_CONFIG, key=f"chart_{feature_id}")
             
             with col2:
                 st.subheader("😊 Mood Breakdown")
@@ -203,14 +208,13 @@ def render_feature(feature_idx):
     
     # ---------- POPULARITY STYLE ----------
     elif feature_id == "popularity":
-        data = safe_api_call(api.get_popularity_distribution)
         if data:
             dist = data.get('distribution', {})
             col1, col2 = st.columns([1.5, 1])
             
             with col1:
-                fig = viz.plot_popularity_distribution(dist)
-                st.plotly_chart(fig, use_container_width=True)
+                fig = cached_plot('plot_popularity_distribution', dist)
+                st.plotly_chart(fig, use_container_width=True, config=STATIC_PLOT_CONFIG, key=f"chart_{feature_id}")
             
             with col2:
                 st.subheader("⭐ Listener Profile")
@@ -228,24 +232,22 @@ def render_feature(feature_idx):
     
     # ---------- MOOD RADAR ----------
     elif feature_id == "mood_radar":
-        data = safe_api_call(api.get_mood_distribution)
         if data:
             mood_dist = data.get('mood_distribution', {})
-            fig = viz.plot_mood_radar(mood_dist)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = cached_plot('plot_mood_radar', mood_dist)
+            st.plotly_chart(fig, use_container_width=True, config=PLOT_CONFIG, key=f"chart_{feature_id}")
         return
     
     # ---------- GENRE DISTRIBUTION ----------
     elif feature_id == "genre":
-        data = safe_api_call(api.get_genre_distribution)  # Use new endpoint
         if data:
             genres = data.get('genre_distribution', {})
             if genres:
                 col1, col2 = st.columns([1.5, 1])
                 
                 with col1:
-                    fig = viz.plot_genre_distribution(genres)
-                    st.plotly_chart(fig, use_container_width=True)
+                    fig = cached_plot('plot_genre_distribution', genres)
+                    st.plotly_chart(fig, use_container_width=True, config=STATIC_PLOT_CONFIG, key=f"chart_{feature_id}")
                 
                 with col2:
                     st.subheader("🎸 Genre Stats")
@@ -259,13 +261,12 @@ def render_feature(feature_idx):
     
     # ---------- EXPLICIT CONTENT ----------
     elif feature_id == "explicit":
-        data = safe_api_call(api.get_explicit_analysis)
         if data:
             col1, col2 = st.columns([1.5, 1])
             
             with col1:
-                fig = viz.plot_explicit_distribution(data)
-                st.plotly_chart(fig, use_container_width=True)
+                fig = cached_plot('plot_explicit_distribution', data)
+                st.plotly_chart(fig, use_container_width=True, config=STATIC_PLOT_CONFIG, key=f"chart_{feature_id}")
             
             with col2:
                 st.subheader("🔞 Content Rating")
@@ -289,37 +290,42 @@ if not st.session_state.get('data_uploaded', False):
 if "feature_index" not in st.session_state:
     st.session_state.feature_index = 0
 
-# Navigation buttons
-col1, col2, col3, col4 = st.columns([1, 2, 2, 1])
+def step_feature(delta):
+    """Move to the previous/next feature; runs as a button callback before the fragment reruns"""
+    st.session_state.feature_index = min(max(st.session_state.feature_index + delta, 0), len(FEATURES) - 1)
+
+
+@st.fragment
+def render_feature_fragment():
+    """Navigation and the current feature; Prev/Next clicks only rerun this fragment"""
+    # Navigation buttons
+    col1, col2, col3, col4 = st.columns([1, 2, 2, 1])
+
+    with col1:
+        st.button("⬅️ Prev", use_container_width=True, on_click=step_feature, args=(-1,))
+
+    with col2:
+        progress = (st.session_state.feature_index + 1) / len(FEATURES)
+        st.progress(progress)
 
-with col1:
-    if st.button("⬅️ Prev", use_container_width=True):
-        if st.session_state.feature_index > 0:
-            st.session_state.feature_index -= 1
-            st.rerun()
+    with col3:
+        st.markdown(
+            f"<div style='text-align:center; padding:8px;'><b>{st.session_state.feature_index + 1} / {len(FEATURES)}</b></div>",
+            unsafe_allow_html=True
+        )
 
-with col2:
-    progress = (st.session_state.feature_index + 1) / len(FEATURES)
-    st.progress(progress)
+    with col4:
+        st.button("Next ➡️", use_container_width=True, on_click=step_feature, args=(1,))
 
-with col3:
-    st.markdown(
-        f"<div style='text-align:center; padding:8px;'><b>{st.session_state.feature_index + 1} / {len(FEATURES)}</b></div>",
-        unsafe_allow_html=True
-    )
+    st.divider()
 
-with col4:
-    if st.button("Next ➡️", use_container_width=True):
-        if st.session_state.feature_index < len(FEATURES) - 1:
-            st.session_state.feature_index += 1
-            st.rerun()
+    # Render current feature
+    render_feature(st.session_state.feature_index)
 
-st.divider()
+    # Show feature info
+    current_feature = FEATURES[st.session_state.feature_index]
+    st.markdown(f"### {current_feature['title']}")
+    st.caption(current_feature['description'])
 
-# Render current feature
-render_feature(st.session_state.feature_index)
 
-# Show feature info
-current_feature = FEATURES[st.session_state.feature_index]
-st.markdown(f"### {current_feature['title']}")
-st.caption(current_feature['description'])
\ No newline at end of file
+render_feature_fragment()
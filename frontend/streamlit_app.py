@@ -3,21 +3,28 @@ Spotify Wrapped — BOLD, EXCITING, Modern Analytics
 """
 
 import streamlit as st
-import requests
-import pandas as pd
+import heapq
+import io
+import orjson
 import sys
+import uuid
+from operator import itemgetter
 from pathlib import Path
-import plotly.graph_objects as go
-import plotly.express as px
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # Setup project root and paths
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+# Scripts re-execute on every rerun, so only add the path once
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
 
 # Import global CSS function and config
 from frontend.global_css import apply_global_css
-from frontend.frontend_config import API_BASE_URL, APP_TITLE, APP_ICON, COLORS
+from frontend.navigation import render_nav
+from frontend.frontend_config import API_BASE_URL, APP_TITLE, APP_ICON
+from utils.api_client import get_http
+from utils.session_manager import SessionManager
+from utils.visualizations import PLOT_CONFIG
 
 # Page Configuration
 st.set_page_config(
@@ -29,6 +36,9 @@ st.set_page_config(
 # Apply the global styles from global_css.py
 apply_global_css()
 
+# Evict cached page data the user has not touched in a while
+SessionManager.prune_expired()
+
 # Define the new theme palette for reuse in charts
 THEME_PALETTE = ['#8c00ff', '#ff00e5', '#ffffff', '#c8b3ff']
 
@@ -36,55 +46,135 @@ THEME_PALETTE = ['#8c00ff', '#ff00e5', '#ffffff', '#c8b3ff']
 # CACHE & HELPERS
 # ============================================================================
 
-@st.cache_data(ttl=30)
-def check_api_health():
+# Pooled keep-alive session shared with the pages' APIClient
+SESSION = get_http()
+
+def _fetch(path, params=(), timeout=10):
     try:
-        resp = requests.get(f"{API_BASE_URL}/health", timeout=5)
-        return resp.status_code == 200, resp.json() if resp.ok else None
+        resp = SESSION.get(f"{API_BASE_URL}{path}", params=dict(params), timeout=timeout)
+        if resp.status_code != 200:
+            return False, None
+        return True, orjson.loads(resp.content)
     except:
         return False, None
 
-def upload_csv_file(uploaded_file):
+@st.cache_data(ttl=5, show_spinner=False)
+def check_api_health():
+    return _fetch("/health", timeout=5)
+
+def _upload_id():
+    return (st.session_state.get('upload_info') or {}).get('id')
+
+def upload_csv_file(file_name, file_bytes):
     try:
-        if hasattr(uploaded_file, "seek"):
-            uploaded_file.seek(0)
-        files = {'file': (uploaded_file.name, uploaded_file)}
-        resp = requests.post(f"{API_BASE_URL}/upload", files=files, timeout=30)
-        return resp.status_code == 200, resp.json()
+        files = {'file': (file_name, io.BytesIO(file_bytes), 'text/csv')}
+        resp = SESSION.post(f"{API_BASE_URL}/upload", files=files, timeout=30)
+        return resp.status_code == 200, orjson.loads(resp.content)
     except Exception as e:
         return False, str(e)
 
-@st.cache_data(ttl=20)
-def get_mood_distribution():
-    try:
-        resp = requests.get(f"{API_BASE_URL}/mood-distribution", timeout=10)
-        return resp.status_code == 200, resp.json()
-    except:
-        return False, None
-
-@st.cache_data(ttl=20)
-def get_stats():
-    try:
-        resp = requests.get(f"{API_BASE_URL}/stats", timeout=10)
-        return resp.status_code == 200, resp.json()
-    except:
-        return False, None
+@st.cache_data(ttl=3600, show_spinner=False)
+def _build_mood_pie(mood_items):
+    """Mood donut from a tuple of (mood, percentage) pairs, largest first"""
+    import plotly.graph_objects as go
+    
+    fig = go.Figure(data=[go.Pie(
+        labels=[m for m, _ in mood_items],
+        values=[pct for _, pct in mood_items],
+        hole=0.4,
+        marker=dict(colors=THEME_PALETTE,
+                   line=dict(color='#040407', width=3))
+    )])
+    fig.update_layout(
+        showlegend=False, 
+        paper_bgcolor='rgba(0,0,0,0)', 
+        plot_bgcolor='rgba(0,0,0,0)',
+        font_color="white"
+    )
+    return fig
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _build_artist_bar(artist_items):
+    """Top-artists bar from a tuple of (artist, track_count) pairs"""
+    import plotly.graph_objects as go
+    
+    # Top 12 by count, ascending so the largest bar ends up on top
+    top = heapq.nlargest(12, artist_items, key=itemgetter(1))[::-1]
+    fig = go.Figure(data=[go.Bar(
+        x=[count for _, count in top],
+        y=[artist for artist, _ in top],
+        orientation='h',
+        marker_color='#8c00ff',
+        hovertemplate='track_count=%{x}<br>artist=%{y}<extra></extra>'
+    )])
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)', 
+        plot_bgcolor='rgba(0,0,0,0)', 
+        font_color="white",
+        margin=dict(t=60),
+        xaxis=dict(title_text='track_count', gridcolor='rgba(140, 0, 255, 0.1)'),
+        yaxis=dict(title_text='artist', gridcolor='rgba(140, 0, 255, 0.1)')
+    )
+    return fig
+
+@st.cache_data
+def _preview_csv(file_id, _raw):
+    """First rows of an uploaded CSV, parsed once per file (keyed on the uploader's file_id)"""
+    import pandas as pd
+    return pd.read_csv(io.BytesIO(_raw), nrows=3)
+
+@st.cache_resource
+def _upload_executor():
+    return ThreadPoolExecutor(max_workers=2)
+
+@st.fragment(run_every=1)
+def poll_upload():
+    """Show upload progress and apply the result once the background upload finishes"""
+    fut = st.session_state.get('upload_future')
+    if fut is None:
+        return
+    if not fut.done():
+        st.status("🎵 Analyzing your music taste...", state="running")
+        return
+    
+    del st.session_state['upload_future']
+    success, result = fut.result()
+    if success:
+        st.session_state['data_uploaded'] = True
+        st.session_state['upload_info'] = {**result, 'id': uuid.uuid4().hex}
+        st.session_state['upload_message'] = ("success", f"✅ Uploaded {result.get('rows', '?')} tracks!")
+    else:
+        st.session_state['upload_message'] = ("error", f"❌ {result}")
+    st.rerun()
 
-@st.cache_data(ttl=20)
-def get_top_artists(n=12):
-    try:
-        resp = requests.get(f"{API_BASE_URL}/top-artists?n={n}", timeout=10)
-        return resp.status_code == 200, resp.json()
-    except:
-        return False, None
+@st.cache_data(ttl=24 * 60 * 60, show_spinner=False)
+def _fetch_dashboard(upload_id):
+    """Mood distribution, top 12 artists and top 10 tracks, fetched concurrently once per upload"""
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        f_mood = pool.submit(_fetch, "/mood-distribution")
+        f_artists = pool.submit(_fetch, "/top-artists", (("n", 12),))
+        f_tracks = pool.submit(_fetch, "/top-tracks", (("n", 10),))
+        results = (f_mood.result(), f_artists.result(), f_tracks.result())
+    
+    if not all(ok for ok, _ in results):
+        # Raising keeps the failure out of st.cache_data so the next render retries
+        raise RuntimeError("Dashboard request failed")
+    return tuple(payload for _, payload in results)
 
-@st.cache_data(ttl=20)
-def get_top_tracks(n=15):
+def _dashboard_data():
+    """(mood, artists, tracks) payloads for the current upload, or None after warning that the backend failed"""
     try:
-        resp = requests.get(f"{API_BASE_URL}/top-tracks?n={n}", timeout=10)
-        return resp.status_code == 200, resp.json()
-    except:
-        return False, None
+        return _fetch_dashboard(_upload_id())
+    except RuntimeError:
+        st.warning("⚠️ Couldn't load this section from the API. Reopen it to retry.")
+        return None
+
+# Two-row template for the sidebar download; a literal, so the home page never needs pandas for it
+SAMPLE_CSV = (
+    b"Track Name,Artist Name(s),Duration (ms),Popularity\n"
+    b"Song A,Artist 1,180000,65\n"
+    b"Song B,Artist 2,210000,72\n"
+)
 
 # ============================================================================
 # SIDEBAR — NAVIGATION
@@ -94,32 +184,11 @@ st.sidebar.markdown(f"# {APP_ICON} {APP_TITLE}")
 st.sidebar.markdown("### Your listening story, visualized.")
 st.sidebar.divider()
 
-st.sidebar.markdown("### 🧭 NAVIGATE")
-nav_col1, nav_col2, nav_col3 = st.sidebar.columns(3)
-
-with nav_col1:
-    if st.button("🏠", help="Home Page", use_container_width=True, key="nav_home"):
-        st.session_state['current_page'] = 'home'
-        st.rerun()
-
-with nav_col2:
-    if st.button("🎵", help="Your Wrapped", use_container_width=True, key="nav_wrapped"):
-        st.switch_page("pages/wrapped_page.py")
-
-with nav_col3:
-    if st.button("🎯", help="Recommendations", use_container_width=True, key="nav_rec"):
-        st.switch_page("pages/recommendations_page.py")
+render_nav("home")
 
 st.sidebar.divider()
 
-sample_df = pd.DataFrame({
-    "Track Name": ["Song A", "Song B"],
-    "Artist Name(s)": ["Artist 1", "Artist 2"],
-    "Duration (ms)": [180000, 210000],
-    "Popularity": [65, 72]
-})
-csv_bytes = sample_df.to_csv(index=False).encode("utf-8")
-st.sidebar.download_button("📥 Download Sample", csv_bytes, "sample.csv", "text/csv", use_container_width=True)
+st.sidebar.download_button("📥 Download Sample", SAMPLE_CSV, "sample.csv", "text/csv", use_container_width=True)
 st.sidebar.info("📋 Export from Spotify & upload CSV")
 
 if st.sidebar.button("🗑️ CLEAR SESSION", use_container_width=True):
@@ -152,26 +221,32 @@ with col1:
 uploaded_file = st.file_uploader("", type=['csv'], label_visibility="collapsed")
 
 if uploaded_file:
+    # Read the bytes once; the preview and the upload both work from this buffer
+    raw = uploaded_file.getvalue()
     try:
-        uploaded_file.seek(0)
-        preview_df = pd.read_csv(uploaded_file, nrows=3)
+        preview_df = _preview_csv(uploaded_file.file_id, raw)
         with st.expander("👀 Preview", expanded=False):
             st.dataframe(preview_df, use_container_width=True)
     except:
         pass
 
-    if st.button("🚀 ANALYZE NOW", use_container_width=True):
-        with st.spinner("🎵 Analyzing your music taste..."):
-            uploaded_file.seek(0)
-            success, result = upload_csv_file(uploaded_file)
+    uploading = 'upload_future' in st.session_state
+    if st.button("🚀 ANALYZE NOW", use_container_width=True, disabled=uploading):
+        # The worker gets the bytes, not the widget's stream, so it never shares a read position
+        st.session_state['upload_future'] = _upload_executor().submit(
+            upload_csv_file, uploaded_file.name, raw
+        )
+        st.rerun()
+
+if 'upload_future' in st.session_state:
+    poll_upload()
 
-        if success:
-            st.success(f"✅ Uploaded {result.get('rows', '?')} tracks!")
-            st.session_state['data_uploaded'] = True
-            st.session_state['upload_info'] = result
-            st.rerun()
-        else:
-            st.error(f"❌ {result}")
+if 'upload_message' in st.session_state:
+    kind, message = st.session_state.pop('upload_message')
+    if kind == "success":
+        st.success(message)
+    else:
+        st.error(message)
 
 st.divider()
 
@@ -179,9 +254,11 @@ st.divider()
 # DASHBOARD
 # ============================================================================
 
-if st.session_state.get('data_uploaded'):
-    info = st.session_state.get('upload_info', {})
-    
+# Each section is a fragment; the heavy ones sit in keyed expanders and only
+# fetch and draw while open, so a fresh page paints just the KPI row.
+
+@st.fragment
+def _render_kpis(info):
     st.subheader("📊 YOUR STATS")
     kpi1, kpi2, kpi3, kpi4, kpi5 = st.columns(5)
     
@@ -196,69 +273,77 @@ if st.session_state.get('data_uploaded'):
         st.metric("⭐ POP", f"{info.get('preview', {}).get('avg_popularity', 0):.0f}")
     with kpi5:
         st.metric("🔞 EXPLICIT", info.get('preview', {}).get('explicit_count', 0))
+
+@st.fragment
+def _render_mood():
+    section = st.expander("🎭 YOUR MOOD SIGNATURE", expanded=False, key="dash_mood", on_change="rerun")
+    if not section.open:
+        return
     
-    st.divider()
-    
-    st.subheader("🎭 YOUR MOOD SIGNATURE")
-    c1, c2 = st.columns([1.2, 1])
-    
-    with c1:
-        ok, mood_data = get_mood_distribution()
-        if ok and mood_data:
+    with section:
+        c1, c2 = st.columns([1.2, 1])
+        
+        # One (mood, pct, count) list sorted by count feeds both the chart and the headline
+        data = _dashboard_data()
+        if data is None:
+            return
+        mood_data, _, _ = data
+        mood_items = []
+        if mood_data:
             mood_dist = mood_data.get('mood_distribution', {})
-            mood_rows = [{'Mood': m, 'Pct': d.get('percentage', 0)} for m, d in mood_dist.items()]
-            mood_df = pd.DataFrame(mood_rows).sort_values('Pct', ascending=False)
-            
-            if not mood_df.empty:
-                fig = go.Figure(data=[go.Pie(
-                    labels=mood_df['Mood'],
-                    values=mood_df['Pct'],
-                    hole=0.4,
-                    marker=dict(colors=THEME_PALETTE,
-                               line=dict(color='#040407', width=3))
-                )])
-                fig.update_layout(
-                    showlegend=False, 
-                    paper_bgcolor='rgba(0,0,0,0)', 
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font_color="white"
-                )
-                st.plotly_chart(fig, use_container_width=True)
-
-    with c2:
-        if ok and mood_data:
-            mood_dist = mood_data.get('mood_distribution', {})
-            mood_rows = [{'Mood': m, 'Count': d.get('count', 0)} for m, d in mood_dist.items()]
-            mood_df = pd.DataFrame(mood_rows).sort_values('Count', ascending=False)
-            if not mood_df.empty:
-                top_mood = mood_df.iloc[0]['Mood']
+            mood_items = [(m, d.get('percentage', 0), d.get('count', 0)) for m, d in mood_dist.items()]
+            mood_items.sort(key=itemgetter(2), reverse=True)
+        
+        with c1:
+            if mood_items:
+                st.plotly_chart(_build_mood_pie(tuple((m, pct) for m, pct, _ in mood_items)), use_container_width=True, config=PLOT_CONFIG, key="mood_pie")
+
+        with c2:
+            if mood_items:
+                top_mood = mood_items[0][0]
                 st.markdown(f"## 🎯 TOP: **{top_mood}**")
                 st.markdown("Your taste is heavily leaning towards this energy.")
 
-    st.divider()
+@st.fragment
+def _render_artists():
+    section = st.expander("🎤 TOP ARTISTS", expanded=False, key="dash_artists", on_change="rerun")
+    if not section.open:
+        return
+    
+    with section:
+        data = _dashboard_data()
+        if data is None:
+            return
+        _, artists, _ = data
+        if artists:
+            artist_list = artists.get('top_artists', [])
+            if artist_list:
+                artist_items = tuple((a['artist'], a['track_count']) for a in artist_list)
+                st.plotly_chart(_build_artist_bar(artist_items), use_container_width=True, config=PLOT_CONFIG, key="top_artists_bar")
+
+@st.fragment
+def _render_tracks():
+    section = st.expander("🏆 YOUR MOST POPULAR TRACKS", expanded=False, key="dash_tracks", on_change="rerun")
+    if not section.open:
+        return
     
-    st.subheader("🎤 TOP ARTISTS")
-    ok_a, artists = get_top_artists(12)
-    if ok_a and artists:
-        artist_list = artists.get('top_artists', [])
-        if artist_list:
-            artist_df = pd.DataFrame(artist_list).sort_values('track_count', ascending=True).tail(12)
-            fig = px.bar(artist_df, x='track_count', y='artist', orientation='h',
-                         color_discrete_sequence=['#8c00ff'])
-            fig.update_layout(
-                paper_bgcolor='rgba(0,0,0,0)', 
-                plot_bgcolor='rgba(0,0,0,0)', 
-                font_color="white",
-                xaxis=dict(gridcolor='rgba(140, 0, 255, 0.1)'),
-                yaxis=dict(gridcolor='rgba(140, 0, 255, 0.1)')
-            )
-            st.plotly_chart(fig, use_container_width=True)
+    with section:
+        data = _dashboard_data()
+        if data is None:
+            return
+        _, _, tracks = data
+        if tracks:
+            track_list = tracks.get('top_tracks', [])
+            if track_list:
+                # One markdown element for the whole list instead of one per track
+                st.markdown("\n\n".join(
+                    f"**{idx}. {track.get('track_name', 'Unknown')}** — {track.get('artist', 'Unknown')}"
+                    for idx, track in enumerate(track_list[:10], 1)
+                ))
 
+if st.session_state.get('data_uploaded'):
+    _render_kpis(st.session_state.get('upload_info', {}))
     st.divider()
-
-    st.subheader("🏆 YOUR MOST POPULAR TRACKS")
-    ok_t, tracks = get_top_tracks(10)
-    if ok_t and tracks:
-        track_list = tracks.get('top_tracks', [])
-        for idx, track in enumerate(track_list[:10], 1):
-            st.markdown(f"**{idx}. {track.get('track_name', 'Unknown')}** — {track.get('artist', 'Unknown')}")
\ No newline at end of file
+    _render_mood()
+    _render_artists()
+    _render_tracks()
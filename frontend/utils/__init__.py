@@ -3,10 +3,30 @@ Utils package for Spotify Wrapped frontend
 Contains API client and visualization utilities
 """
 
-from .api_client import APIClient
-from .visualizations import Visualizer
-from .session_manager import SessionManager
-from .data_validator import DataValidator
-from .format_helpers import FormatHelpers
+from importlib import import_module
 
-__all__ = ['APIClient', 'Visualizer', 'SessionManager', 'DataValidator', 'FormatHelpers']
+# Exports are resolved on first access, so importing one submodule
+# (e.g. utils.api_client) doesn't drag in pandas via data_validator
+_EXPORTS = {
+    'APIClient': 'api_client',
+    'get_api': 'api_client',
+    'get_http': 'api_client',
+    'Visualizer': 'visualizations',
+    'get_visualizer': 'visualizations',
+    'cached_plot': 'visualizations',
+    'PLOT_CONFIG': 'visualizations',
+    'STATIC_PLOT_CONFIG': 'visualizations',
+    'SessionManager': 'session_manager',
+    'DataValidator': 'data_validator',
+    'FormatHelpers': 'format_helpers',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
@@ -3,26 +3,39 @@ API Client for Flask Backend Communication
 Handles all requests to the Spotify Wrapped API
 """
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 import streamlit as st
 
+@st.cache_resource
+def get_http():
+    """Process-wide keep-alive session; every API call shares its connection pool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 class APIClient:
     """Client for communicating with Flask API"""
     
     def __init__(self, base_url="http://localhost:5000"):
         self.base_url = base_url
+        self.session = get_http()
     
     def _make_request(self, method, endpoint, **kwargs):
         """Make HTTP request with error handling"""
         url = f"{self.base_url}{endpoint}"
         
         try:
-            response = requests.request(method, url, timeout=10, **kwargs)
+            response = self.session.request(method, url, timeout=10, **kwargs)
             
             if response.status_code == 200:
-                return response.json()
+                return orjson.loads(response.content)
             else:
-                error_msg = response.json().get('error', 'Request failed')
+                error_msg = orjson.loads(response.content).get('error', 'Request failed')
                 st.error(f"API Error: {error_msg}")
                 return None
                 
@@ -81,8 +94,11 @@ class APIClient:
         return self._make_request('GET', '/genre-distribution')
     
     def get_audio_features(self):
-        """Get average audio features"""
-        return self._make_request('GET', '/audio-features')
+        """Get average audio features, with keys normalized to lowercase"""
+        data = self._make_request('GET', '/audio-features')
+        if data and data.get('audio_features'):
+            data['audio_features'] = {k.strip().lower(): v for k, v in data['audio_features'].items()}
+        return data
     
     # ============================================================================
     # RATING-BASED RECOMMENDATION ENDPOINTS
@@ -121,3 +137,9 @@ class APIClient:
     def health_check(self):
         """Check API health"""
         return self._make_request('GET', '/health')
+
+
+@st.cache_resource
+def get_api():
+    """Shared APIClient reused across reruns and sessions"""
+    return APIClient()
@@ -3,11 +3,53 @@ Session State Manager for Spotify Wrapped
 Centralized session state management
 """
 
+import time
+import zlib
+
+import orjson
 import streamlit as st
 
+# Seconds an evictable group may go unused before it is dropped from session state
+SESSION_TTL = 1800
+
+# Large, re-fetchable entries, evicted together so a page never sees half a group
+EVICTION_GROUPS = {
+    'wrapped': ('feature_cache',),
+    'rating_session': ('songs_to_rate', 'user_ratings', 'current_song_index', 'recommendations', 'rating_phase'),
+}
+
 class SessionManager:
     """Manages Streamlit session state"""
     
+    @staticmethod
+    def touch(group):
+        """Record that a page is using an eviction group"""
+        st.session_state.setdefault('_ts', {})[group] = time.monotonic()
+    
+    @staticmethod
+    def prune_expired(ttl=SESSION_TTL):
+        """Drop every eviction group that has not been touched within ttl seconds"""
+        stamps = st.session_state.get('_ts')
+        if not stamps:
+            return
+        now = time.monotonic()
+        for group, stamp in list(stamps.items()):
+            if now - stamp > ttl:
+                for key in EVICTION_GROUPS[group]:
+                    st.session_state.pop(key, None)
+                del stamps[group]
+    
+    @staticmethod
+    def store_compressed(key, value):
+        """Store a JSON-serializable value as zlib-compressed bytes"""
+        st.session_state[key] = zlib.compress(orjson.dumps(value))
+    
+    @staticmethod
+    def load_compressed(key):
+        """Load a value saved with store_compressed, or None if absent"""
+        raw = st.session_state.get(key)
+        return None if raw is None else orjson.loads(zlib.decompress(raw))
+    
     @staticmethod
     def init_session_state():
         """Initialize all session state variables"""
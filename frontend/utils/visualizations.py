@@ -3,183 +3,240 @@ Visualization utilities for Spotify Wrapped
 Updated Theme: Glowy Purple, Vibrant Pink, and White
 """
 
-import plotly.graph_objects as go
-import plotly.express as px
+import numpy as np
+import streamlit as st
+from itertools import islice
+from types import MappingProxyType
+
+# Theme palette, shared by every figure
+COLORS = MappingProxyType({
+    'primary': '#8c00ff',    # Deep Purple
+    'secondary': '#ff00e5',  # Vibrant Pink
+    'accent': '#c8b3ff',     # Light Purple Glow
+    'white': '#ffffff',      # Pure White
+    'dark_bg': '#040407'     # Deep Black
+})
+
+# Categorical palette for Pie charts and Multi-bar charts
+PALETTE = (COLORS['primary'], COLORS['secondary'], COLORS['white'], COLORS['accent'])
+
+BASE_LAYOUT = MappingProxyType({
+    'paper_bgcolor': 'rgba(0,0,0,0)',
+    'plot_bgcolor': 'rgba(0,0,0,0)',
+    'font': dict(color='#ffffff', family='Montserrat, sans-serif'),
+    'showlegend': False,
+    'margin': dict(l=20, r=20, t=60, b=20),
+    # Keep zoom/pan state across reruns and skip relayout animations
+    'uirevision': 'static',
+    'transition': {'duration': 0}
+})
+
+# Client-side chart options for st.plotly_chart: no modebar, resize with the container.
+# A plain dict, since Streamlit json-encodes it as-is
+PLOT_CONFIG = {'displayModeBar': False, 'responsive': True}
+
+# Summary charts nobody zooms into: drawn once, no hover/interaction handlers attached
+STATIC_PLOT_CONFIG = {**PLOT_CONFIG, 'staticPlot': True}
+
+# Per-chart constants, built once instead of on every plot_* call
+_TRACK_COLORSCALE = ((0, '#1a0033'), (1, COLORS['primary']))
+_ARTIST_COLORSCALE = ((0, '#330066'), (1, COLORS['secondary']))
+_GENRE_X_AXIS = MappingProxyType({'tickangle': -45})
+
+_X_AXIS_STYLE = MappingProxyType(dict(gridcolor='rgba(140, 0, 255, 0.1)', zeroline=False))
+_Y_AXIS_STYLE = MappingProxyType(dict(gridcolor='rgba(140, 0, 255, 0.1)', zeroline=False))
+
+def _truncate(s, n=25):
+    """Clip a bar label to n characters, leaving short labels untouched"""
+    return s if len(s) <= n else s[:n]
+
+def _unzip(pairs):
+    """Split (a, b) pairs into two tuples in a single pass; empty input gives two empty tuples"""
+    return tuple(zip(*pairs)) or ((), ())
 
 class Visualizer:
-    def __init__(self):
-        # New Theme Palette
-        self.colors = {
-            'primary': '#8c00ff',    # Deep Purple
-            'secondary': '#ff00e5',  # Vibrant Pink
-            'accent': '#c8b3ff',     # Light Purple Glow
-            'white': '#ffffff',      # Pure White
-            'dark_bg': '#040407'     # Deep Black
-        }
-        
-        # Categorical palette for Pie charts and Multi-bar charts
-        self.palette = [self.colors['primary'], self.colors['secondary'], self.colors['white'], self.colors['accent']]
-        
-        self.base_layout = {
-            'paper_bgcolor': 'rgba(0,0,0,0)',
-            'plot_bgcolor': 'rgba(0,0,0,0)',
-            'font': dict(color='#ffffff', family='Montserrat, sans-serif'),
-            'showlegend': False,
-            'margin': dict(l=20, r=20, t=60, b=20)
-        }
+    # Stateless: no per-instance __dict__, everything below lives on the class
+    __slots__ = ()
+
+    # Module constants exposed under the original attribute names
+    colors = COLORS
+    palette = PALETTE
+    base_layout = BASE_LAYOUT
+
+    # Figures are plain plotly-JSON dicts: st.plotly_chart accepts them directly,
+    # and they skip the go.* validators at build time and pickle cheaply in cached_plot.
 
-    def _apply_axes_style(self, fig):
-        """Helper to apply consistent grid and axis styling"""
-        fig.update_xaxes(gridcolor='rgba(140, 0, 255, 0.1)', zeroline=False)
-        fig.update_yaxes(gridcolor='rgba(140, 0, 255, 0.1)', zeroline=False)
-        return fig
+    def _layout(self, title, axes=False, **extra):
+        """Themed layout dict; axes=True adds the shared grid styling to both axes"""
+        layout = {**self.base_layout, 'height': 400, 'title': title}
+        if axes:
+            layout['xaxis'] = {**_X_AXIS_STYLE, **extra.pop('xaxis', {})}
+            layout['yaxis'] = {**_Y_AXIS_STYLE, **extra.pop('yaxis', {})}
+        layout.update(extra)
+        return layout
 
     def plot_top_tracks(self, tracks):
         """Top tracks horizontal bar with Purple Gradient"""
-        names = [t.get('track_name', 'Unknown')[:25] for t in tracks[:10]]
-        pop = [t.get('popularity', 0) for t in tracks[:10]]
+        names, pop = _unzip((_truncate(t.get('track_name', 'Unknown')), t.get('popularity', 0)) for t in islice(tracks, 10))
         
-        fig = go.Figure(data=[go.Bar(
-            y=names, x=pop, orientation='h',
-            marker=dict(
-                color=pop, 
-                colorscale=[[0, '#1a0033'], [1, self.colors['primary']]],
-                line=dict(color=self.colors['accent'], width=1)
-            ),
-            text=pop, textposition='outside'
-        )])
-        fig.update_layout(**self.base_layout, height=400, title='Top Tracks')
-        fig.update_yaxes(autorange='reversed')
-        return self._apply_axes_style(fig)
+        return {
+            'data': [{
+                'type': 'bar', 'y': names, 'x': pop, 'orientation': 'h',
+                'marker': {
+                    'color': pop,
+                    'colorscale': _TRACK_COLORSCALE,
+                    'line': {'color': self.colors['accent'], 'width': 1}
+                },
+                'text': pop, 'textposition': 'outside'
+            }],
+            'layout': self._layout('Top Tracks', axes=True, yaxis={'autorange': 'reversed'})
+        }
     
     def plot_top_artists(self, artists):
         """Top artists horizontal bar"""
-        names = [a.get('artist', 'Unknown')[:25] for a in artists[:10]]
-        counts = [a.get('track_count', 0) for a in artists[:10]]
+        names, counts = _unzip((_truncate(a.get('artist', 'Unknown')), a.get('track_count', 0)) for a in islice(artists, 10))
         
-        fig = go.Figure(data=[go.Bar(
-            y=names, x=counts, orientation='h',
-            marker=dict(
-                color=counts, 
-                colorscale=[[0, '#330066'], [1, self.colors['secondary']]],
-                line=dict(color='#ffffff', width=1)
-            ),
-            text=counts, textposition='outside'
-        )])
-        fig.update_layout(**self.base_layout, height=400, title='Top Artists')
-        fig.update_yaxes(autorange='reversed')
-        return self._apply_axes_style(fig)
+        return {
+            'data': [{
+                'type': 'bar', 'y': names, 'x': counts, 'orientation': 'h',
+                'marker': {
+                    'color': counts,
+                    'colorscale': _ARTIST_COLORSCALE,
+                    'line': {'color': '#ffffff', 'width': 1}
+                },
+                'text': counts, 'textposition': 'outside'
+            }],
+            'layout': self._layout('Top Artists', axes=True, yaxis={'autorange': 'reversed'})
+        }
     
     def plot_mood_distribution(self, mood_dist):
         """Pie chart using the Purple/Pink/White palette"""
         moods = list(mood_dist.keys())
         pcts = [mood_dist[m].get('percentage', 0) for m in moods]
         
-        fig = go.Figure(data=[go.Pie(
-            labels=moods, values=pcts,
-            marker=dict(colors=self.palette, line=dict(color=self.colors['dark_bg'], width=2)),
-            textposition='inside', textinfo='label+percent',
-            hole=0.4
-        )])
-        fig.update_layout(**self.base_layout, height=400, title='Mood Distribution')
-        return fig
+        return {
+            'data': [{
+                'type': 'pie', 'labels': moods, 'values': pcts,
+                'marker': {'colors': list(self.palette), 'line': {'color': self.colors['dark_bg'], 'width': 2}},
+                'textposition': 'inside', 'textinfo': 'label+percent',
+                'hole': 0.4
+            }],
+            'layout': self._layout('Mood Distribution')
+        }
     
     def plot_mood_radar(self, mood_dist):
         """Radar chart with Pink Glow"""
         moods = list(mood_dist.keys())
         values = [mood_dist[m].get('percentage', 0) for m in moods]
         
-        fig = go.Figure(data=[go.Scatterpolar(
-            r=values, theta=moods,
-            fill='toself',
-            marker=dict(color=self.colors['secondary']),
-            line=dict(color=self.colors['secondary'], width=3),
-            fillcolor='rgba(255, 0, 229, 0.3)'
-        )])
-        fig.update_layout(
-            **self.base_layout, 
-            height=400, 
-            title='Mood Radar', 
-            polar=dict(bgcolor='rgba(0,0,0,0)', radialaxis=dict(gridcolor='rgba(255,255,255,0.1)'))
-        )
-        return fig
+        return {
+            'data': [{
+                'type': 'scatterpolar', 'r': values, 'theta': moods,
+                'fill': 'toself',
+                'marker': {'color': self.colors['secondary']},
+                'line': {'color': self.colors['secondary'], 'width': 3},
+                'fillcolor': 'rgba(255, 0, 229, 0.3)'
+            }],
+            'layout': self._layout(
+                'Mood Radar',
+                polar={'bgcolor': 'rgba(0,0,0,0)', 'radialaxis': {'gridcolor': 'rgba(255,255,255,0.1)'}}
+            )
+        }
     
     def plot_genre_distribution(self, genres):
         """Top genres bar chart in Purple"""
-        names = list(genres.keys())[:10]
-        counts = [genres[g].get('count', 0) for g in names]
+        names, counts = _unzip((g, d.get('count', 0)) for g, d in islice(genres.items(), 10))
         
-        fig = go.Figure(data=[go.Bar(
-            x=names, y=counts,
-            marker=dict(color=self.colors['primary'], line=dict(color=self.colors['accent'], width=1)),
-            text=counts, textposition='outside'
-        )])
-        fig.update_layout(**self.base_layout, height=400, title='Genres', xaxis=dict(tickangle=-45))
-        return self._apply_axes_style(fig)
+        return {
+            'data': [{
+                'type': 'bar', 'x': names, 'y': counts,
+                'marker': {'color': self.colors['primary'], 'line': {'color': self.colors['accent'], 'width': 1}},
+                'text': counts, 'textposition': 'outside'
+            }],
+            'layout': self._layout('Genres', axes=True, xaxis=_GENRE_X_AXIS)
+        }
     
     def plot_temporal_trends(self, yearly, monthly):
         """Timeline chart with glowing Pink line"""
-        years = sorted([int(y) for y in yearly.keys()])
-        counts = [yearly[str(y)] for y in years]
+        if len(yearly) < 32:
+            # Short histories: plain Python beats the NumPy setup cost
+            years = sorted([int(y) for y in yearly.keys()])
+            counts = [yearly[str(y)] for y in years]
+        else:
+            years = np.fromiter(yearly.keys(), dtype='U8', count=len(yearly)).astype(np.int32)
+            counts = np.fromiter(yearly.values(), dtype=np.int64, count=len(yearly))
+            order = np.argsort(years, kind='stable')
+            years, counts = years[order], counts[order]
         
-        fig = go.Figure(data=[go.Scatter(
-            x=years, y=counts, mode='lines+markers',
-            line=dict(color=self.colors['secondary'], width=4),
-            marker=dict(size=10, color=self.colors['white'], line=dict(color=self.colors['secondary'], width=2))
-        )])
-        fig.update_layout(**self.base_layout, height=400, title='Listening Over Time')
-        return self._apply_axes_style(fig)
+        return {
+            'data': [{
+                'type': 'scatter', 'x': years, 'y': counts, 'mode': 'lines+markers',
+                'line': {'color': self.colors['secondary'], 'width': 4},
+                'marker': {'size': 10, 'color': self.colors['white'], 'line': {'color': self.colors['secondary'], 'width': 2}}
+            }],
+            'layout': self._layout('Listening Over Time', axes=True)
+        }
     
     def plot_audio_features_radar(self, stats):
         """Radar for audio features with Purple Glow"""
         features = ['danceability', 'energy', 'valence', 'acousticness']
-        values = []
         
         audio = stats.get('audio_features', {})
-        for f in features:
-            val = audio.get(f, 0)
-            if val <= 1: val = val * 100
-            values.append(val)
+        # 0-1 scores are scaled to the 0-100 radial range; values already on that scale pass through
+        raw = np.fromiter((audio.get(f, 0) for f in features), dtype=np.float64, count=len(features))
+        values = np.where(raw <= 1, raw * 100, raw)
         
-        fig = go.Figure(data=[go.Scatterpolar(
-            r=values, theta=[f.title() for f in features],
-            fill='toself',
-            marker=dict(color=self.colors['accent'], size=8),
-            line=dict(color=self.colors['primary'], width=3),
-            fillcolor='rgba(140, 0, 255, 0.4)'
-        )])
-        fig.update_layout(
-            **self.base_layout, 
-            height=400, 
-            title='Audio Profile',
-            polar=dict(
-                radialaxis=dict(visible=True, range=[0, 100], color='#9aa0a6', gridcolor='rgba(255,255,255,0.1)'),
-                bgcolor='rgba(0,0,0,0)'
+        return {
+            'data': [{
+                'type': 'scatterpolar', 'r': values, 'theta': [f.title() for f in features],
+                'fill': 'toself',
+                'marker': {'color': self.colors['accent'], 'size': 8},
+                'line': {'color': self.colors['primary'], 'width': 3},
+                'fillcolor': 'rgba(140, 0, 255, 0.4)'
+            }],
+            'layout': self._layout(
+                'Audio Profile',
+                polar={
+                    'radialaxis': {'visible': True, 'range': [0, 100], 'color': '#9aa0a6', 'gridcolor': 'rgba(255,255,255,0.1)'},
+                    'bgcolor': 'rgba(0,0,0,0)'
+                }
             )
-        )
-        return fig
+        }
     
     def plot_popularity_distribution(self, dist):
         """Popularity breakdown in Theme Colors"""
-        cats = list(dist.keys())
-        counts = [dist[c].get('count', 0) for c in cats]
+        cats, counts = _unzip((c, d.get('count', 0)) for c, d in dist.items())
         
-        fig = go.Figure(data=[go.Bar(
-            x=cats, y=counts,
-            marker=dict(color=self.palette[:3]),
-            text=counts, textposition='outside'
-        )])
-        fig.update_layout(**self.base_layout, height=400, title='Popularity Preference')
-        return self._apply_axes_style(fig)
+        return {
+            'data': [{
+                'type': 'bar', 'x': cats, 'y': counts,
+                'marker': {'color': list(self.palette[:3])},
+                'text': counts, 'textposition': 'outside'
+            }],
+            'layout': self._layout('Popularity Preference', axes=True)
+        }
     
     def plot_explicit_distribution(self, data):
         """Explicit vs clean chart"""
-        fig = go.Figure(data=[go.Bar(
-            x=['Explicit', 'Clean'],
-            y=[data.get('explicit_count', 0), data.get('clean_count', 0)],
-            marker=dict(color=[self.colors['secondary'], self.colors['primary']]),
-            text=[data.get('explicit_count', 0), data.get('clean_count', 0)],
-            textposition='outside'
-        )])
-        fig.update_layout(**self.base_layout, height=400, title='Explicit Content')
-        return self._apply_axes_style(fig)
\ No newline at end of file
+        counts = [data.get('explicit_count', 0), data.get('clean_count', 0)]
+        
+        return {
+            'data': [{
+                'type': 'bar', 'x': ['Explicit', 'Clean'], 'y': counts,
+                'marker': {'color': [self.colors['secondary'], self.colors['primary']]},
+                'text': counts, 'textposition': 'outside'
+            }],
+            'layout': self._layout('Explicit Content', axes=True)
+        }
+
+
+@st.cache_resource
+def get_visualizer():
+    """Shared Visualizer reused across reruns and sessions"""
+    return Visualizer()
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_plot(method, *args):
+    """Build a Visualizer figure once per distinct input, e.g. cached_plot('plot_top_tracks', tracks)"""
+    return getattr(get_visualizer(), method)(*args)
@@ -38,7 +38,7 @@ class SpotifyMusicRecommender:
         
         # Scale features
         self.scaler = StandardScaler()
-        self.scaled_features = self.scaler.fit_transform(self.features)
+        self.scaled_features = np.ascontiguousarray(self.scaler.fit_transform(self.features), dtype=np.float32)
         
         # Build KNN model
         print("Building KNN model...")
@@ -115,7 +115,7 @@ class SpotifyMusicRecommender:
         
         instance.df = data_dict['df']
         instance.feature_cols = data_dict['feature_cols']
-        instance.scaled_features = data_dict['scaled_features']
+        instance.scaled_features = np.ascontiguousarray(data_dict['scaled_features'], dtype=np.float32)
         
         print(f"✅ Model loaded successfully ({len(instance.df)} tracks)")
         return instance
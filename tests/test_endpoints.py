@@ -0,0 +1,67 @@
+"""
+Analytics endpoint tests for the analysis API
+Run from the project root: python -m unittest discover tests
+"""
+
+import io
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+
+import spotify_api_dynamic as api
+
+
+def playlist_csv(rows):
+    """CSV with one track per artist, so top-artists can return up to `rows` entries"""
+    lines = ["Track Name,Artist Name(s),Duration (ms),Popularity,Genres"]
+    lines += [f"Song {i},Artist {i},180000,{i % 100},pop" for i in range(rows)]
+    return "\n".join(lines) + "\n"
+
+
+class UploadedPlaylistTest(unittest.TestCase):
+    """Uploads a 120-track playlist before each test"""
+
+    def setUp(self):
+        self.upload_dir = tempfile.TemporaryDirectory()
+        api.app.config['UPLOAD_FOLDER'] = self.upload_dir.name
+        self.client = api.app.test_client()
+        data = {'file': (io.BytesIO(playlist_csv(120).encode()), 'playlist.csv')}
+        resp = self.client.post('/upload', data=data, content_type='multipart/form-data')
+        self.assertEqual(resp.status_code, 200, resp.get_json())
+
+    def tearDown(self):
+        self.upload_dir.cleanup()
+
+
+class TopNTest(UploadedPlaylistTest):
+    def test_n_above_cache_bound_is_not_truncated(self):
+        for _ in range(2):
+            artists = self.client.get('/top-artists?n=100').get_json()['top_artists']
+            self.assertEqual(len(artists), 100)
+            tracks = self.client.get('/top-tracks?n=100').get_json()['top_tracks']
+            self.assertEqual(len(tracks), 100)
+
+    def test_only_bounded_n_values_are_cached(self):
+        for n in (5, 5, 100, 1000):
+            self.client.get(f'/top-artists?n={n}')
+        cached_n = {key[2] for key in api._CACHE if key[0] == 'top_artists'}
+        self.assertEqual(cached_n, {5})
+
+
+class GenreDistributionTest(UploadedPlaylistTest):
+    def test_failure_is_a_500_and_not_cached(self):
+        with mock.patch.object(api.pd.Series, 'explode', side_effect=RuntimeError('boom')):
+            resp = self.client.get('/genre-distribution')
+        self.assertEqual(resp.status_code, 500)
+
+        resp = self.client.get('/genre-distribution')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()['genres'], {'pop': 120})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+"""
+Upload tests for the analysis API
+Run from the project root: python -m unittest discover tests
+"""
+
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+
+import spotify_api_dynamic as api
+
+
+class UploadTest(unittest.TestCase):
+    def setUp(self):
+        self.upload_dir = tempfile.TemporaryDirectory()
+        api.app.config['UPLOAD_FOLDER'] = self.upload_dir.name
+        self.client = api.app.test_client()
+
+    def tearDown(self):
+        self.upload_dir.cleanup()
+
+    def upload(self, csv_text):
+        data = {'file': (io.BytesIO(csv_text.encode()), 'playlist.csv')}
+        return self.client.post('/upload', data=data, content_type='multipart/form-data')
+
+    def test_non_numeric_audio_cell_does_not_reject_upload(self):
+        resp = self.upload(
+            "Track Name,Artist Name(s),Duration (ms),Popularity,Energy,Danceability\n"
+            "Song A,Artist 1,180000,65,abc,0.5\n"
+            "Song B,Artist 2,210000,72,0.7,0.6\n"
+        )
+        self.assertEqual(resp.status_code, 200, resp.get_json())
+        self.assertEqual(resp.get_json()['rows'], 2)
+
+        features = self.client.get('/audio-features').get_json()['audio_features']
+        self.assertEqual(features['energy'], 0.7)
+        self.assertEqual(features['danceability'], 0.55)
+
+
+if __name__ == '__main__':
+    unittest.main()